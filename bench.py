@@ -0,0 +1,238 @@
+"""
+Benchmark suite.
+
+Times every stage of the pipeline on a few board configurations and writes
+the results as JSON, so two versions can be compared stage by stage:
+
+    - import time of the main modules (each in a fresh interpreter),
+    - building the placement table and enumerating the valid games,
+    - building the compact theory (number of constraints) and ``E.compile()``
+      (clauses and variables), plus the original Game-atom ``build_theory``
+      and its ``E.compile()`` on boards small enough for it,
+    - one kissat solve of the compiled theory,
+    - per-move latency of the density board (GameState), of the incremental
+      SAT session and of the conditioned d-DNNF, over one game played by the
+      density strategy. SAT moves that reuse the previous model are reported
+      apart (``sat_session_reused``) from those that call the solver.
+
+Stages that cannot run here (a missing solver binary, a board too large to
+enumerate) are reported with an "error" or "skipped" entry instead of a time.
+
+    python bench.py                      # small boards, JSON on stdout
+    python bench.py --full -o bench.json # also the standard 10x10 board
+"""
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from bitboard import DEFAULT_CONFIG, STANDARD_CONFIG, BoardConfig, PlacementTable
+from compact import E, build_compact_theory
+from game_state import GameState
+from sampling import ENUMERATE_MAX_SIZE, fleet_sampler
+
+IMPORT_MODULES = ["bitboard", "game_state", "compact", "solver_session", "temp", "run"]
+
+SMALL_CONFIGS = [DEFAULT_CONFIG, BoardConfig(7, (5, 4, 3)), BoardConfig(8, (4, 3, 2))]
+
+# the Game-atom theory of run.py lists every game as a variable
+LEGACY_MAX_SIZE = 6
+
+
+def timed(fn, repeat=1):
+    """
+    Run ``fn`` ``repeat`` times; return (best time in seconds, last result).
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def latency(samples):
+    if not samples:
+        return {"moves": 0}
+    return {"moves": len(samples), "mean_ms": 1000 * float(np.mean(samples)), "max_ms": 1000 * float(np.max(samples))}
+
+
+def describe(config):
+    return {"size": config.size, "boat_lengths": list(config.boat_lengths), "adjacency": config.adjacency}
+
+
+# ----- Stages -----
+
+def bench_imports():
+    results = {}
+    for module in IMPORT_MODULES:
+        code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+        proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+        if proc.returncode:
+            results[module] = {"error": proc.stderr.strip().splitlines()[-1]}
+        else:
+            results[module] = {"seconds": float(proc.stdout)}
+    return results
+
+
+def bench_enumeration(config, repeat):
+    seconds, table = timed(lambda: PlacementTable(config), repeat)
+    result = {"placements": len(table), "placements_seconds": seconds}
+    if config.size > ENUMERATE_MAX_SIZE:
+        result["games"] = {"skipped": f"board larger than {ENUMERATE_MAX_SIZE}x{ENUMERATE_MAX_SIZE}"}
+    else:
+        seconds, games = timed(lambda: list(table.iter_games()), repeat)
+        result["games"] = {"count": len(games), "seconds": seconds}
+    return result
+
+
+def bench_theory(config):
+    result = {}
+    seconds, encoding = timed(lambda: build_compact_theory(config))
+    result["build_theory"] = {"constraints": len(encoding._custom_constraints), "seconds": seconds}
+    seconds, T = timed(E.compile)
+    result["compile"] = {"clauses": len(T.children), "vars": len(T.vars()), "seconds": seconds}
+
+    try:
+        from nnf import kissat
+        seconds, model = timed(lambda: kissat.solve(T))
+        result["kissat_solve"] = {"seconds": seconds, "satisfiable": model is not None}
+    except (AssertionError, OSError) as e:
+        result["kissat_solve"] = {"error": str(e) or type(e).__name__}
+
+    if config.size <= LEGACY_MAX_SIZE:
+        import run
+        seconds, legacy = timed(lambda: run.build_theory(config))
+        result["legacy_build_theory"] = {"constraints": len(legacy._custom_constraints), "seconds": seconds}
+        seconds, T = timed(legacy.compile)
+        result["legacy_compile"] = {"children": len(T.children), "vars": len(T.vars()), "seconds": seconds}
+    else:
+        result["legacy_build_theory"] = {"skipped": f"board larger than {LEGACY_MAX_SIZE}x{LEGACY_MAX_SIZE}"}
+    return result
+
+
+def play_moves(config, seed):
+    """
+    The guesses of one game played by the density strategy, with results.
+    """
+    from strategy import DensityStrategy
+    hidden = fleet_sampler(config).sample_board(random.Random(seed))
+    state = GameState(config)
+    player_board = [[0] * config.size for _ in range(config.size)]
+    strategy = DensityStrategy()
+    moves = []
+    remaining = sum(config.boat_lengths)
+    while remaining:
+        x, y = strategy(player_board, state)
+        is_hit = hidden[x][y] == 1
+        player_board[x][y] = 'H' if is_hit else 'M'
+        state.process_guess(x, y, is_hit)
+        moves.append((x, y, is_hit))
+        remaining -= is_hit
+    return moves
+
+
+def bench_moves(config, seed):
+    result = {}
+    if config.size > ENUMERATE_MAX_SIZE:
+        result["density"] = {"skipped": f"board larger than {ENUMERATE_MAX_SIZE}x{ENUMERATE_MAX_SIZE}"}
+        moves = None
+    else:
+        moves = play_moves(config, seed)
+        state = GameState(config)
+        samples = []
+        for x, y, is_hit in moves:
+            start = time.perf_counter()
+            state.process_guess(x, y, is_hit)
+            state.occupancy()
+            samples.append(time.perf_counter() - start)
+        result["density"] = latency(samples)
+
+    if moves is None:
+        # no enumeration to pick moves from, so replay random cells against a sampled fleet
+        rng = random.Random(seed)
+        hidden = fleet_sampler(config).sample_board(rng)
+        cells = [(r, c) for r in range(config.size) for c in range(config.size)]
+        rng.shuffle(cells)
+        moves = [(x, y, hidden[x][y] == 1) for x, y in cells[:30]]
+
+    from solver_session import SolverSession
+    with SolverSession(config) as session:
+        # a model that still agrees with the guess is returned without a
+        # solver call, so those moves are timed apart from the real solves
+        solved, reused = [], []
+        for x, y, is_hit in moves:
+            start = time.perf_counter()
+            session.observe(x, y, is_hit)
+            samples = solved if session._model is None else reused
+            session.solve()
+            samples.append(time.perf_counter() - start)
+    result["sat_session"] = latency(solved)
+    result["sat_session_reused"] = latency(reused)
+
+    if config.size > LEGACY_MAX_SIZE:
+        result["ddnnf"] = {"skipped": f"board larger than {LEGACY_MAX_SIZE}x{LEGACY_MAX_SIZE}"}
+        return result
+    try:
+        from counting import CompiledBoard
+        seconds, board = timed(lambda: CompiledBoard(config))
+        samples = []
+        for x, y, is_hit in moves:
+            start = time.perf_counter()
+            board.observe(x, y, is_hit)
+            board.hit_counts()
+            samples.append(time.perf_counter() - start)
+        result["ddnnf"] = dict(latency(samples), compile_seconds=seconds)
+    except (OSError, RuntimeError) as e:
+        result["ddnnf"] = {"error": str(e)}
+    return result
+
+
+def run_benchmarks(configs, repeat=3, seed=0):
+    results = {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "commit": _git_commit(),
+        "imports": bench_imports(),
+        "configs": [],
+    }
+    for config in configs:
+        entry = {"config": describe(config)}
+        entry["enumeration"] = bench_enumeration(config, repeat)
+        entry["theory"] = bench_theory(config)
+        entry["moves"] = bench_moves(config, seed)
+        results["configs"].append(entry)
+    return results
+
+
+def _git_commit():
+    try:
+        proc = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True)
+    except OSError:
+        return None
+    return proc.stdout.strip() or None
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark theory build, compile, solve and per-move latency.")
+    parser.add_argument("--full", action="store_true", help="also run the standard 10x10 board")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="write the JSON here instead of stdout")
+    args = parser.parse_args()
+
+    configs = SMALL_CONFIGS + ([STANDARD_CONFIG] if args.full else [])
+    results = run_benchmarks(configs, args.repeat, args.seed)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
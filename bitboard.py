@@ -0,0 +1,287 @@
+"""
+Bitboard placement engine.
+
+Every boat placement is stored as an integer bitmask over the board, where
+cell (r, c) is bit r * board_size + c. Alongside it we keep a "halo" mask:
+the boat plus every cell another boat may not use under the board's
+adjacency rule (by default every touching cell, diagonals included). Two
+boats clash exactly when the mask of one ANDs with the halo of the other, so
+the separation checks are a single operation and a game is just a tuple of
+indices into the placement table.
+"""
+from functools import lru_cache
+
+BOARD_SIZE = 6
+BOAT_LENGTHS = (5, 4, 3)
+
+# Which neighbours of a boat cell another boat may not occupy
+ADJACENCY_RULES = {
+    "diagonal": [(dr, dc) for dr in [-1, 0, 1] for dc in [-1, 0, 1]],
+    "edge": [(0, 0), (-1, 0), (1, 0), (0, -1), (0, 1)],
+    "none": [(0, 0)],
+}
+
+
+class BoardConfig:
+    """
+    Board size, the length of every ship in the fleet, and the adjacency rule
+    ("diagonal": boats may not touch at all, "edge": boats may touch at the
+    corners, "none": boats only may not overlap).
+    """
+
+    def __init__(self, size=BOARD_SIZE, boat_lengths=BOAT_LENGTHS, adjacency="diagonal"):
+        if adjacency not in ADJACENCY_RULES:
+            raise ValueError(f"Unknown adjacency rule {adjacency!r}, expected one of {list(ADJACENCY_RULES)}")
+        if any(length > size for length in boat_lengths):
+            raise ValueError(f"A boat of length {max(boat_lengths)} does not fit on a {size}x{size} board")
+        self.size = size
+        self.boat_lengths = tuple(boat_lengths)
+        self.adjacency = adjacency
+
+    def _key(self):
+        return (self.size, self.boat_lengths, self.adjacency)
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __eq__(self, __value: object) -> bool:
+        return isinstance(__value, BoardConfig) and self._key() == __value._key()
+
+    def __repr__(self):
+        return f"BoardConfig({self.size}, {self.boat_lengths}, {self.adjacency!r})"
+
+
+DEFAULT_CONFIG = BoardConfig()
+# Standard game: 10x10 with a carrier, battleship, two cruisers and a destroyer
+STANDARD_CONFIG = BoardConfig(10, (5, 4, 3, 3, 2))
+
+
+# ----------------------------------------- Masks -----------------------------------------
+
+def cell_bit(r, c, board_size=BOARD_SIZE):
+    return 1 << (r * board_size + c)
+
+
+def coords_to_mask(coords, board_size=BOARD_SIZE):
+    mask = 0
+    for r, c in coords:
+        mask |= cell_bit(r, c, board_size)
+    return mask
+
+
+def mask_to_ids(mask):
+    ids = []
+    while mask:
+        low = mask & -mask
+        ids.append(low.bit_length() - 1)
+        mask ^= low
+    return ids
+
+
+def mask_to_coords(mask, board_size=BOARD_SIZE):
+    return [divmod(cell, board_size) for cell in mask_to_ids(mask)]
+
+
+def halo_mask(coords, board_size=BOARD_SIZE, adjacency="diagonal"):
+    """
+    Mask of the boat and every cell around it (per the adjacency rule) that is still on the board.
+    """
+    mask = 0
+    for r, c in coords:
+        for dr, dc in ADJACENCY_RULES[adjacency]:
+            i, j = r + dr, c + dc
+            if 0 <= i < board_size and 0 <= j < board_size:
+                mask |= cell_bit(i, j, board_size)
+    return mask
+
+
+# ----------------------------------------- Placements -----------------------------------------
+
+def create_placements(length, board_size=BOARD_SIZE):
+    """
+    Yield (coords, orientation) for every placement of a boat of the given length.
+    """
+    for r in range(board_size):
+        for start in range((board_size + 1) - length):
+            yield tuple((r, start + i) for i in range(length)), "horizontal"
+
+    # a boat of length one looks the same either way, only emit it once
+    if length == 1:
+        return
+
+    for c in range(board_size):
+        for start in range((board_size + 1) - length):
+            yield tuple((start + i, c) for i in range(length)), "vertical"
+
+
+def iter_fleets(ships, masks, halos, blocked=0):
+    """
+    Yield every way to pick one id from each list in ``ships`` so that no
+    chosen placement overlaps ``blocked`` or the halo of another chosen one.
+
+    Boats are placed one at a time by backtracking; every placed boat adds
+    its halo to the blocked cells, so a clash prunes the whole subtree
+    instead of being found after the full product has been built. Ships with
+    the same candidate list (boats of equal length) take increasing ids, so
+    each fleet is yielded once.
+    """
+    # the previous ship with the same candidates, if any
+    twin = [None] * len(ships)
+    for ship in range(len(ships)):
+        for other in range(ship):
+            if ships[other] == ships[ship]:
+                twin[ship] = other
+    game = []
+
+    def place(ship, blocked):
+        if ship == len(ships):
+            yield tuple(game)
+            return
+        candidates = ships[ship]
+        if twin[ship] is not None:
+            candidates = [i for i in candidates if i > game[twin[ship]]]
+        for i in candidates:
+            if masks[i] & blocked:
+                continue
+            game.append(i)
+            yield from place(ship + 1, blocked | halos[i])
+            game.pop()
+
+    yield from place(0, blocked)
+
+
+class PlacementTable:
+    """
+    Flat tables of every boat placement for a board configuration.
+
+    Placement ``i`` has ``coords[i]``, ``masks[i]``, ``halos[i]``, ``lengths[i]``
+    and ``orientations[i]``; ``by_length[length]`` lists the placement ids of
+    that length. ``cell_placements`` is the inverted index: one bitmask of
+    placement ids per cell.
+    """
+
+    def __init__(self, config=DEFAULT_CONFIG):
+        self.config = config
+        self.board_size = config.size
+        self.boat_lengths = list(config.boat_lengths)
+        self.coords = []
+        self.masks = []
+        self.halos = []
+        self.lengths = []
+        self.orientations = []
+        self.by_length = {}
+        # cell_placements[cell] has bit i set when placement i covers that cell
+        self.cell_placements = [0] * (self.board_size * self.board_size)
+        self._games = None
+
+        for length in self.boat_lengths:
+            if length in self.by_length:
+                continue
+            self.by_length[length] = []
+            for coords, orientation in create_placements(length, self.board_size):
+                placement = len(self.masks)
+                self.by_length[length].append(placement)
+                for r, c in coords:
+                    self.cell_placements[r * self.board_size + c] |= 1 << placement
+                self.coords.append(coords)
+                self.masks.append(coords_to_mask(coords, self.board_size))
+                self.halos.append(halo_mask(coords, self.board_size, config.adjacency))
+                self.lengths.append(length)
+                self.orientations.append(orientation)
+
+    def __len__(self):
+        return len(self.masks)
+
+    def placements_covering(self, r, c):
+        return mask_to_ids(self.cell_placements[r * self.board_size + c])
+
+    def sunk_placements(self, r, c, length, hit_mask):
+        """
+        Placements a boat of ``length`` just sunk at (r, c) can have: through
+        that cell and entirely on ``hit_mask``.
+        """
+        return [i for i in self.placements_covering(r, c)
+                if self.lengths[i] == length and not self.masks[i] & ~hit_mask]
+
+    def boats_are_separated(self, i, j):
+        return not (self.masks[i] & self.halos[j])
+
+    def is_valid_game(self, game):
+        for a in range(len(game)):
+            for b in range(a + 1, len(game)):
+                if not self.boats_are_separated(game[a], game[b]):
+                    return False
+        return True
+
+    def game_mask(self, game):
+        mask = 0
+        for i in game:
+            mask |= self.masks[i]
+        return mask
+
+    def iter_games(self, blocked=0):
+        """
+        Yield every valid game as a tuple of placement ids, one per boat in
+        ``boat_lengths``, skipping placements that use a ``blocked`` cell.
+        """
+        ships = [self.by_length[length] for length in self.boat_lengths]
+        return iter_fleets(ships, self.masks, self.halos, blocked)
+
+    def games(self):
+        """
+        Every valid game as a list of placement-id tuples. Enumerated on first
+        use and kept afterwards, so only use it on boards small enough to list.
+        """
+        if self._games is None:
+            self._games = list(self.iter_games())
+        return self._games
+
+
+@lru_cache(maxsize=None)
+def placement_table(config=DEFAULT_CONFIG):
+    """
+    Shared, lazily built placement table for a board configuration.
+    """
+    return PlacementTable(config)
+
+
+# ----------------------------------------- Hidden boards -----------------------------------------
+
+class HiddenFleet:
+    """
+    The hidden side of a game: one placement id per ship, as the fleet
+    sampler draws them, and the cells hit so far. A boat is sunk once its
+    whole mask is on hit cells, so boats that touch (under a looser
+    adjacency rule) are still told apart.
+    """
+
+    def __init__(self, table, game):
+        self.table = table
+        self.game = tuple(game)
+        self.mask = table.game_mask(self.game)
+        self.hit_mask = 0
+
+    def board(self):
+        """
+        The fleet as a 0/1 board.
+        """
+        size = self.table.board_size
+        board = [[0] * size for _ in range(size)]
+        for r, c in mask_to_coords(self.mask, size):
+            board[r][c] = 1
+        return board
+
+    def fire(self, r, c):
+        """
+        Shoot at (r, c). Returns (is_hit, length of the boat this shot sank or 0).
+        """
+        bit = cell_bit(r, c, self.table.board_size)
+        if not self.mask & bit:
+            return False, 0
+        self.hit_mask |= bit
+        for i in self.game:
+            if self.table.masks[i] & bit:
+                return True, 0 if self.table.masks[i] & ~self.hit_mask else self.table.lengths[i]
+
+    def all_sunk(self):
+        return not self.mask & ~self.hit_mask
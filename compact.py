@@ -0,0 +1,108 @@
+"""
+Compact SAT encoding of a board configuration.
+
+Instead of one atom per game (which grows with the product of the boats),
+there is one ``Place(ship, placement)`` atom per ship and placement, and one
+``Hit(coords)`` atom per cell. The theory says that:
+
+    - every ship takes exactly one placement,
+    - a cell is hit exactly when a chosen placement covers it,
+    - two ships never take placements that clash (one overlaps the halo of
+      the other); these clauses are only emitted for clashing pairs.
+
+Every constraint is written as a clause, so ``E.compile()`` is already in CNF
+and goes straight to the SAT solver without a Tseitin pass.
+"""
+from bauhaus import Encoding, proposition, Or
+
+from bitboard import DEFAULT_CONFIG, coords_to_mask, placement_table
+from propositions import Hashable
+
+# Bump whenever the shape of the theory changes, so cached theories are rebuilt
+ENCODING_VERSION = 1
+
+E = Encoding()
+
+
+# ----------------------------------------- Propositions -----------------------------------------
+@proposition(E)
+class Place(Hashable):
+    __slots__ = ("ship", "placement")
+
+    def __init__(self, ship: int, placement: int):
+        self.ship = ship
+        self.placement = placement
+        self._set_key(self.ship, self.placement)
+
+    def __str__(self):
+        return f"Place({self.ship}, {self.placement})"
+
+
+@proposition(E)
+class Hit(Hashable):
+    __slots__ = ("coords",)
+
+    def __init__(self, coords: tuple):
+        self.coords = coords
+        self._set_key(self.coords)
+
+    def __str__(self):
+        return f"Hit({self.coords})"
+
+
+# ----------------------------------------- Theory -----------------------------------------
+def build_compact_theory(config=DEFAULT_CONFIG):
+    E._custom_constraints.clear()
+    table = placement_table(config)
+    size = config.size
+    ships = [table.by_length[length] for length in config.boat_lengths]
+
+    # every ship takes exactly one placement
+    for ship, placements in enumerate(ships):
+        E.add_constraint(Or([Place(ship, p) for p in placements]))
+        for i, p in enumerate(placements):
+            for q in placements[i + 1:]:
+                E.add_constraint(~Place(ship, p) | ~Place(ship, q))
+
+    # a cell is hit exactly when a chosen placement covers it
+    covering = {(r, c): [] for r in range(size) for c in range(size)}
+    for ship, placements in enumerate(ships):
+        for p in placements:
+            for coords in table.coords[p]:
+                covering[coords].append(Place(ship, p))
+                E.add_constraint(~Place(ship, p) | Hit(coords))
+    for coords, places in covering.items():
+        E.add_constraint(Or([~Hit(coords)] + places))
+
+    # clashing placements of two different ships exclude each other
+    for ship1 in range(len(ships)):
+        for ship2 in range(ship1 + 1, len(ships)):
+            for p in ships[ship1]:
+                for q in ships[ship2]:
+                    if not table.boats_are_separated(p, q):
+                        E.add_constraint(~Place(ship1, p) | ~Place(ship2, q))
+    return E
+
+
+def decode_fleet(solution, config=DEFAULT_CONFIG):
+    """
+    Placement id of each ship in a model of the compact theory.
+    """
+    fleet = [None] * len(config.boat_lengths)
+    for var, value in solution.items():
+        if value and isinstance(var, Hashable) and var.__class__.__name__ == "Place":
+            fleet[var.ship] = var.placement
+    return tuple(fleet)
+
+
+def sunk_places(config, guesses, x, y, length):
+    """
+    The hit at (x, y) sank a boat of ``length``: some ship of that length
+    takes one of the placements through (x, y) made only of hits. Returns the
+    candidate placement ids and the ``Place`` atoms the boat can be.
+    """
+    table = placement_table(config)
+    hit_mask = coords_to_mask([(r, c) for r, c, is_hit in guesses if is_hit], config.size)
+    candidates = table.sunk_placements(x, y, length, hit_mask)
+    ships = [ship for ship, ship_length in enumerate(table.boat_lengths) if ship_length == length]
+    return candidates, [Place(ship, p) for ship in ships for p in candidates]
@@ -0,0 +1,247 @@
+"""
+Exact hit probabilities by model counting.
+
+The theory of the current position is compiled once to a smooth d-DNNF
+with ``dsharp`` (shipped in ``bin/``). On such a circuit the number of
+models is a single bottom-up pass, and one top-down pass of partial
+derivatives gives, for every literal at once, the number of models in which
+it holds. So the probability of a hit on every cell of the board comes out of
+one compile and two linear passes, instead of one counting or SAT call per
+cell.
+
+During a game the base theory is compiled once per configuration, and a
+``CompiledBoard`` conditions that circuit on each new guess by switching off
+the leaves that contradict it. Nothing is recompiled; every move costs the
+same two linear passes. A sunk boat is not a single literal (any ship of its
+length may take any candidate placement), but those choices exclude each
+other, so the passes run once per combination of choices and add up.
+
+Boats of equal length are interchangeable in the encoding, so every fleet is
+counted once per ordering of its twins; that factor cancels in the
+probabilities.
+"""
+import itertools
+import os
+import shutil
+
+from nnf import And, Var, dsharp
+
+from bitboard import DEFAULT_CONFIG
+from compact import Hit, sunk_places
+from theory_cache import cache_key, compiled_theory
+
+DSHARP = shutil.which("dsharp") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "bin", "dsharp")
+
+LEAF, AND, OR = 0, 1, 2
+
+_circuits = {}
+
+
+def compile_ddnnf(T):
+    """
+    Compile a CNF theory to a smooth d-DNNF with dsharp.
+    """
+    return dsharp.compile(T, executable=DSHARP, smooth=True)
+
+
+class Circuit:
+    """
+    A d-DNNF flattened into arrays in topological order (children first), so
+    the counting passes are plain loops instead of recursion.
+    """
+
+    def __init__(self, sentence):
+        self.kinds = []
+        self.children = []
+        self.literals = []
+        index = {}
+
+        # iterative post-order walk; dsharp shares nodes, so dedupe by identity
+        stack = [(sentence, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if id(node) in index:
+                continue
+            if isinstance(node, Var):
+                index[id(node)] = len(self.kinds)
+                self.kinds.append(LEAF)
+                self.children.append(())
+                self.literals.append((node.name, node.true))
+            elif not expanded:
+                stack.append((node, True))
+                for child in node.children:
+                    if id(child) not in index:
+                        stack.append((child, False))
+            else:
+                index[id(node)] = len(self.kinds)
+                self.kinds.append(AND if isinstance(node, And) else OR)
+                self.children.append(tuple(index[id(child)] for child in node.children))
+                self.literals.append(None)
+
+        self.root = index[id(sentence)]
+        # leaves of each variable, for looking up marginals
+        self.leaves = {}
+        for i, literal in enumerate(self.literals):
+            if literal is not None:
+                self.leaves.setdefault(literal[0], []).append(i)
+
+    def counts(self, evidence=None):
+        """
+        Number of models below every node, with leaves that contradict
+        ``evidence`` (a dict of variable -> bool) counted as zero.
+        """
+        evidence = evidence or {}
+        values = [0] * len(self.kinds)
+        for i, kind in enumerate(self.kinds):
+            if kind == LEAF:
+                name, true = self.literals[i]
+                values[i] = 0 if evidence.get(name, true) != true else 1
+            elif kind == OR:
+                values[i] = sum(values[child] for child in self.children[i])
+            else:
+                product = 1
+                for child in self.children[i]:
+                    product *= values[child]
+                    if not product:
+                        break
+                values[i] = product
+        return values
+
+    def derivatives(self, values):
+        """
+        For every node, the number of models of the whole circuit that go
+        through it, per unit of its own count (the partial derivative of the
+        root count with respect to that node).
+        """
+        grads = [0] * len(self.kinds)
+        grads[self.root] = 1
+        for i in range(len(self.kinds) - 1, -1, -1):
+            grad = grads[i]
+            if not grad or self.kinds[i] == LEAF:
+                continue
+            children = self.children[i]
+            if self.kinds[i] == OR:
+                for child in children:
+                    grads[child] += grad
+            else:
+                # product of the siblings of each child, from prefix and suffix products
+                prefix = [1]
+                for child in children:
+                    prefix.append(prefix[-1] * values[child])
+                suffix = 1
+                for k in range(len(children) - 1, -1, -1):
+                    grads[children[k]] += grad * prefix[k] * suffix
+                    suffix *= values[children[k]]
+        return grads
+
+    def marginals(self, names, evidence=None):
+        """
+        Total model count and, for each variable in ``names``, the number of
+        models in which it is true.
+        """
+        values = self.counts(evidence)
+        grads = self.derivatives(values)
+        true_counts = {}
+        for name in names:
+            true_counts[name] = sum(grads[leaf] * values[leaf] for leaf in self.leaves.get(name, [])
+                                    if self.literals[leaf][1])
+        return values[self.root], true_counts
+
+
+def hit_counts(T, config=DEFAULT_CONFIG):
+    """
+    Compile ``T`` once and return (number of models, board of the number of
+    models with a boat on each cell).
+    """
+    circuit = Circuit(compile_ddnnf(T))
+    cells = {Hit((r, c)): (r, c) for r in range(config.size) for c in range(config.size)}
+    total, true_counts = circuit.marginals(cells)
+    board = [[0] * config.size for _ in range(config.size)]
+    for hit, (r, c) in cells.items():
+        board[r][c] = true_counts[hit]
+    return total, board
+
+
+def hit_probabilities(T, config=DEFAULT_CONFIG):
+    total, board = hit_counts(T, config)
+    if not total:
+        return board
+    return [[count / total for count in row] for row in board]
+
+
+def base_circuit(config=DEFAULT_CONFIG):
+    """
+    The d-DNNF of the base theory of a configuration, compiled once per process.
+    """
+    key = cache_key(config)
+    if key not in _circuits:
+        _circuits[key] = Circuit(compile_ddnnf(compiled_theory(config)))
+    return _circuits[key]
+
+
+class CompiledBoard:
+    """
+    Exact hit counts for one game, from the base circuit conditioned on the
+    guesses so far.
+    """
+
+    def __init__(self, config=DEFAULT_CONFIG):
+        self.config = config
+        self.circuit = base_circuit(config)
+        self.cells = {Hit((r, c)): (r, c) for r in range(config.size) for c in range(config.size)}
+        self.guesses = []
+        self.evidence = {}
+        # ships announced sunk, as (length, candidate placement ids) pairs,
+        # and for each the Place atoms it may be
+        self.sunk = []
+        self._sunk_places = []
+        self._result = None
+
+    def observe(self, x, y, is_hit):
+        self.guesses.append((x, y, is_hit))
+        self.evidence[Hit((x, y))] = is_hit
+        self._result = None
+
+    def observe_sunk(self, x, y, length):
+        """
+        The hit at (x, y) sank a boat of ``length``; see ``compact.sunk_places``.
+        """
+        candidates, places = sunk_places(self.config, self.guesses, x, y, length)
+        self.sunk.append((length, tuple(candidates)))
+        self._sunk_places.append(places)
+        self._result = None
+
+    def _marginals(self):
+        if self._result is None:
+            # one ship on one placement per sunk boat; any two choices for the
+            # same boat clash, so their model sets are disjoint and add up
+            total, true_counts = 0, dict.fromkeys(self.cells, 0)
+            for choice in itertools.product(*self._sunk_places):
+                evidence = dict(self.evidence)
+                evidence.update(dict.fromkeys(choice, True))
+                count, counts = self.circuit.marginals(self.cells, evidence)
+                total += count
+                for hit in self.cells:
+                    true_counts[hit] += counts[hit]
+            self._result = total, true_counts
+        return self._result
+
+    def count(self):
+        return self._marginals()[0]
+
+    def hit_counts(self):
+        """
+        (number of models, board of the number of models with a boat on each
+        cell) under the current guesses.
+        """
+        total, true_counts = self._marginals()
+        board = [[0] * self.config.size for _ in range(self.config.size)]
+        for hit, (r, c) in self.cells.items():
+            board[r][c] = true_counts[hit]
+        return total, board
+
+    def hit_probabilities(self):
+        total, board = self.hit_counts()
+        if not total:
+            return board
+        return [[count / total for count in row] for row in board]
@@ -0,0 +1,71 @@
+"""
+Probability-density board over every game that is still consistent.
+
+The surviving games are kept as a NumPy array of placement-id tuples (one
+row per game, one column per boat). ``placement_cells`` is a 0/1 matrix of
+which cells each placement covers, so the occupancy count of every cell is
+one bincount over the surviving placement ids followed by a single matrix
+product.
+"""
+import numpy as np
+
+
+def placement_cells(table):
+    """
+    (placements, cells) matrix with a 1 wherever a placement covers a cell.
+    """
+    n_cells = table.board_size * table.board_size
+    cells = np.zeros((len(table), n_cells), dtype=np.int64)
+    for i, coords in enumerate(table.coords):
+        for r, c in coords:
+            cells[i, r * table.board_size + c] = 1
+    return cells
+
+
+def games_array(table, games=None):
+    if games is None:
+        games = table.games()
+    return np.array(games, dtype=np.int32).reshape(-1, len(table.boat_lengths))
+
+
+def occupancy(cells, games, board_size):
+    """
+    Number of games in ``games`` that have a boat on each cell, as a board.
+    """
+    placement_counts = np.bincount(games.ravel(), minlength=cells.shape[0])
+    return (placement_counts @ cells).reshape(board_size, board_size)
+
+
+def cell_games(cells, games):
+    """
+    (cells, games) bool matrix: does game ``g`` have a boat on cell ``c``.
+    """
+    return cells[games].any(axis=1).T
+
+
+# ----- Bitsets -----
+
+if hasattr(np, "bitwise_count"):
+    def row_popcounts(words):
+        """
+        Number of set bits in each row of a uint64 bitset array.
+        """
+        return np.bitwise_count(words).sum(axis=-1, dtype=np.int64)
+else:
+    _BYTE_COUNTS = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def row_popcounts(words):
+        """
+        Number of set bits in each row of a uint64 bitset array.
+        """
+        return _BYTE_COUNTS[words.view(np.uint8)].sum(axis=-1, dtype=np.int64)
+
+
+def pack_bits(bools):
+    """
+    Pack the last axis of a bool array into uint64 words, zero padded.
+    """
+    padding = -bools.shape[-1] % 64
+    if padding:
+        bools = np.concatenate([bools, np.zeros(bools.shape[:-1] + (padding,), dtype=bool)], axis=-1)
+    return np.packbits(bools, axis=-1).view(np.uint64)
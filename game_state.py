@@ -0,0 +1,118 @@
+"""
+Incremental game state.
+
+A ``GameState`` holds the games that are still consistent with every guess
+made so far, as indices into the full game array. Each guess narrows that
+set once with a lookup in the precomputed cell-to-game index: a survivor is
+kept exactly when it has a boat on the guessed cell and the guess was a hit
+(or it has none and it was a miss). The cost of a move only depends on how
+many games are left.
+
+When a boat is announced sunk, its placement is one of the placements of
+that length through the last hit that lie entirely on hit cells (usually
+exactly one). Every game without such a placement is dropped, and the cells
+around it are recorded as known water.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+import instrument
+from bitboard import DEFAULT_CONFIG, placement_table, cell_bit
+from density import placement_cells, games_array, cell_games, occupancy, pack_bits
+from sampling import ENUMERATE_MAX_SIZE
+
+
+@lru_cache(maxsize=None)
+def game_space(table):
+    """
+    Read-only arrays for a placement table, built once and shared by every
+    GameState on that table: the placement-cell matrix, every valid game, and
+    the cell-to-game index (cell_games[cell] is a bool per game: does it put a
+    boat on that cell). Only boards small enough to list every game have one.
+    """
+    if table.board_size > ENUMERATE_MAX_SIZE:
+        raise ValueError(f"A {table.board_size}x{table.board_size} board has too many games to list "
+                         f"(at most {ENUMERATE_MAX_SIZE}x{ENUMERATE_MAX_SIZE}); use SolverSession instead")
+    cells = placement_cells(table)
+    all_games = games_array(table)
+    return cells, all_games, cell_games(cells, all_games)
+
+
+@lru_cache(maxsize=None)
+def cell_bitsets(table):
+    """
+    The cell-to-game index packed into uint64 words, one bitset of games per
+    cell, so counting the games of a set that cover a cell is a popcount.
+    """
+    return pack_bits(game_space(table)[2])
+
+
+class GameState:
+    def __init__(self, config=DEFAULT_CONFIG):
+        table = placement_table(config)
+        self.config = config
+        self.table = table
+        self.board_size = table.board_size
+        self.cells, self.all_games, self.cell_games = game_space(table)
+        self.alive = np.arange(len(self.all_games))
+        self.guesses = []
+        # ships announced sunk, as (length, candidate placement ids) pairs
+        self.sunk = []
+        self.hit_mask = 0
+        self.miss_mask = 0
+        # cells that cannot hold a boat because they touch a sunk one
+        self.water_mask = 0
+
+    def __len__(self):
+        return len(self.alive)
+
+    @property
+    def games(self):
+        return self.all_games[self.alive]
+
+    def process_guess(self, x, y, is_hit):
+        """
+        Narrow the surviving games with the result of a guess at (x, y).
+        Returns the number of games that are still possible.
+        """
+        with instrument.timer("process_guess"):
+            covered = self.cell_games[x * self.board_size + y, self.alive]
+            self.alive = self.alive[covered == is_hit]
+        instrument.record("candidate_games", len(self.alive))
+
+        self.guesses.append((x, y, is_hit))
+        if is_hit:
+            self.hit_mask |= cell_bit(x, y, self.board_size)
+        else:
+            self.miss_mask |= cell_bit(x, y, self.board_size)
+        return len(self.alive)
+
+    def process_sunk(self, x, y, length):
+        """
+        Narrow the surviving games with the announcement that the hit at
+        (x, y) sank a boat of ``length``. Returns the number of games left.
+        """
+        candidates = self.table.sunk_placements(x, y, length, self.hit_mask)
+        self.alive = self.alive[np.isin(self.all_games[self.alive], candidates).any(axis=1)]
+        self.sunk.append((length, tuple(candidates)))
+
+        # only the cells around every candidate are certain to be empty
+        if candidates:
+            water = -1
+            for i in candidates:
+                water &= self.table.halos[i]
+            self.water_mask |= water & ~self.hit_mask
+        return len(self.alive)
+
+    def alive_bits(self):
+        """
+        The surviving games as a bitset over all games.
+        """
+        alive = np.zeros(len(self.all_games), dtype=bool)
+        alive[self.alive] = True
+        return pack_bits(alive)
+
+    def occupancy(self):
+        with instrument.timer("occupancy"):
+            return occupancy(self.cells, self.games, self.board_size)
@@ -0,0 +1,151 @@
+"""
+Event log of played games.
+
+Every game is appended to a JSON-lines file as it is played, one compact
+event per line:
+
+    {"event": "game", "game": "4242-3", "config": [6, [5, 4, 3], "diagonal"], "board": ["110000", ...], "time": ...}
+    {"event": "guess", "game": "4242-3", "x": 0, "y": 1, "hit": true, "sunk": 0, "ms": 0.4}
+    {"event": "end", "game": "4242-3", "moves": 17}
+
+``ms`` is the time the solver spent on the guess, not the time the player
+took to make it. A game given up before every boat is sunk ends with an
+"end" event marked ``"abandoned": true``. The file is line buffered and only
+ever appended to, so a crash loses at most the line being written, and
+several runs can share one log (game ids start with the id of the writing
+process). ``iter_games`` reads it back as a stream, holding only the games
+that are still open (one, for a log written by a single player), and
+``replay`` re-drives a ``GameState`` from each logged game without any
+input.
+"""
+import json
+import os
+import time
+
+from bitboard import BoardConfig
+from game_state import GameState
+
+
+class GameLog:
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "a", buffering=1)
+        self._next_game = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._file.close()
+
+    def _write(self, event):
+        self._file.write(json.dumps(event, separators=(",", ":")) + "\n")
+
+    def start_game(self, config, board):
+        """
+        Log a new game on the hidden 0/1 ``board`` and return its id.
+        """
+        game = f"{os.getpid()}-{self._next_game}"
+        self._next_game += 1
+        self._write({
+            "event": "game",
+            "game": game,
+            "config": [config.size, list(config.boat_lengths), config.adjacency],
+            "board": ["".join(str(cell) for cell in row) for row in board],
+            "time": time.time(),
+        })
+        return game
+
+    def guess(self, game, x, y, is_hit, sunk=0, ms=None):
+        event = {"event": "guess", "game": game, "x": x, "y": y, "hit": bool(is_hit), "sunk": sunk}
+        if ms is not None:
+            event["ms"] = round(ms, 3)
+        self._write(event)
+
+    def end_game(self, game, moves, abandoned=False):
+        event = {"event": "end", "game": game, "moves": moves}
+        if abandoned:
+            event["abandoned"] = True
+        self._write(event)
+
+
+# ----- Reading -----
+
+class LoggedGame:
+    def __init__(self, game, config, board):
+        self.game = game
+        self.config = config
+        self.board = board
+        # (x, y, is_hit, sunk length or 0)
+        self.guesses = []
+        self.finished = False
+        self.abandoned = False
+
+
+def read_events(path):
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def iter_games(path):
+    """
+    Yield every game of a log, in the order the games end. A game that
+    never ended is yielded at the end with ``finished`` False; one given up
+    has ``finished`` False and ``abandoned`` True.
+    """
+    open_games = {}
+    for event in read_events(path):
+        kind = event["event"]
+        if kind == "game":
+            size, boat_lengths, adjacency = event["config"]
+            board = [[int(cell) for cell in row] for row in event["board"]]
+            open_games[event["game"]] = LoggedGame(event["game"], BoardConfig(size, boat_lengths, adjacency), board)
+        elif kind == "guess":
+            open_games[event["game"]].guesses.append((event["x"], event["y"], event["hit"], event["sunk"]))
+        elif kind == "end":
+            game = open_games.pop(event["game"])
+            game.abandoned = event.get("abandoned", False)
+            game.finished = not game.abandoned
+            yield game
+    yield from open_games.values()
+
+
+def replay(path):
+    """
+    Re-drive a GameState through every logged game. Yields each game with
+    the number of candidate games left after every guess.
+    """
+    for game in iter_games(path):
+        state = GameState(game.config)
+        remaining = []
+        for x, y, is_hit, sunk in game.guesses:
+            state.process_guess(x, y, is_hit)
+            if sunk:
+                state.process_sunk(x, y, sunk)
+            remaining.append(len(state))
+        yield game, remaining
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Replay a game log through the solver.")
+    parser.add_argument("path")
+    args = parser.parse_args()
+
+    games = finished = moves = inconsistent = 0
+    for game, remaining in replay(args.path):
+        games += 1
+        if game.finished:
+            finished += 1
+            moves += len(remaining)
+        if remaining and not remaining[-1]:
+            inconsistent += 1
+    print({"games": games, "finished": finished, "mean_moves": moves / finished if finished else 0.0,
+           "inconsistent": inconsistent})
@@ -0,0 +1,128 @@
+"""
+Opt-in instrumentation.
+
+Timers and counters for the phases of a turn (building and compiling the
+theory, solving, narrowing the candidate games, the density board, cache
+lookups). Everything is off by default: ``timer`` then hands back one shared
+no-op context manager and ``count``/``record`` return straight away, so the
+hooks left in the code cost a function call and nothing else.
+
+Switch it on with ``enable()`` or by setting ``BATTLESHIP_INSTRUMENT=1``,
+then read the numbers with ``report()`` (a dict, ready for JSON),
+``summary()`` (a text table) or ``dump_json(path)``.
+"""
+import json
+import os
+import time
+from contextlib import nullcontext
+
+_enabled = os.environ.get("BATTLESHIP_INSTRUMENT", "") not in ("", "0")
+_NULL = nullcontext()
+
+# name -> [calls, total seconds, max seconds]
+timings = {}
+# name -> running total
+counters = {}
+# name -> [samples, total, max, last]
+values = {}
+
+
+def enable(on=True):
+    global _enabled
+    _enabled = on
+
+
+def enabled():
+    return _enabled
+
+
+def reset():
+    timings.clear()
+    counters.clear()
+    values.clear()
+
+
+class _Timer:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        entry = timings.get(self.name)
+        if entry is None:
+            timings[self.name] = [1, elapsed, elapsed]
+        else:
+            entry[0] += 1
+            entry[1] += elapsed
+            if elapsed > entry[2]:
+                entry[2] = elapsed
+
+
+def timer(name):
+    """
+    Context manager timing the block under ``name``.
+    """
+    if not _enabled:
+        return _NULL
+    return _Timer(name)
+
+
+def count(name, n=1):
+    if _enabled:
+        counters[name] = counters.get(name, 0) + n
+
+
+def record(name, value):
+    """
+    Record one sample of a quantity, such as the number of candidate games.
+    """
+    if not _enabled:
+        return
+    entry = values.get(name)
+    if entry is None:
+        values[name] = [1, value, value, value]
+    else:
+        entry[0] += 1
+        entry[1] += value
+        entry[2] = max(entry[2], value)
+        entry[3] = value
+
+
+# ----- Output -----
+
+def report():
+    return {
+        "timings": {name: {"calls": calls, "total_s": total, "mean_ms": 1000 * total / calls, "max_ms": 1000 * worst}
+                    for name, (calls, total, worst) in sorted(timings.items())},
+        "counters": dict(sorted(counters.items())),
+        "values": {name: {"samples": n, "mean": total / n, "max": worst, "last": last}
+                   for name, (n, total, worst, last) in sorted(values.items())},
+    }
+
+
+def dump_json(path):
+    with open(path, "w") as f:
+        json.dump(report(), f, indent=2)
+
+
+def summary():
+    lines = [f"{'timer':<28}{'calls':>9}{'total s':>11}{'mean ms':>11}{'max ms':>11}"]
+    for name, (calls, total, worst) in sorted(timings.items()):
+        lines.append(f"{name:<28}{calls:>9}{total:>11.3f}{1000 * total / calls:>11.3f}{1000 * worst:>11.3f}")
+    if counters:
+        lines.append("")
+        lines.append(f"{'counter':<28}{'total':>9}")
+        for name, total in sorted(counters.items()):
+            lines.append(f"{name:<28}{total:>9}")
+    if values:
+        lines.append("")
+        lines.append(f"{'value':<28}{'samples':>9}{'mean':>11}{'max':>11}{'last':>11}")
+        for name, (n, total, worst, last) in sorted(values.items()):
+            lines.append(f"{name:<28}{n:>9}{total / n:>11.1f}{worst:>11}{last:>11}")
+    return "\n".join(lines)
@@ -0,0 +1,25 @@
+"""
+Base class shared by the propositions of every encoding.
+
+Propositions hash and compare by a structural key that each subclass sets
+once at the end of ``__init__``, so lookups never rebuild strings. The slots
+include ``_var`` and ``__weakref__`` because bauhaus stores the variable of a
+proposition on the object and keeps weak references to it.
+"""
+
+
+class Hashable:
+    __slots__ = ("_key", "_hash", "_var", "__weakref__")
+
+    def _set_key(self, *key):
+        self._key = key
+        self._hash = hash((self.__class__.__name__,) + key)
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, __value: object) -> bool:
+        return self.__class__ is __value.__class__ and self._key == __value._key
+
+    def __repr__(self):
+        return str(self)
@@ -1,6 +1,11 @@
 from bauhaus import Encoding, proposition, constraint, Or, And
 from bauhaus.utils import count_solutions, likelihood
 import random
+from functools import lru_cache
+
+from bitboard import BoardConfig, coords_to_mask, halo_mask, placement_table
+from propositions import Hashable
+from sampling import ENUMERATE_MAX_SIZE
 
 import pprint
 pp = pprint.PrettyPrinter(indent=4)
@@ -27,199 +32,109 @@ class BasicPropositions:
     def __repr__(self):
         return f"A.{self.data}"
 
-class Hashable:
-    def __hash__(self):
-        return hash(str(self))
-
-    def __eq__(self, __value: object) -> bool:
-        return hash(self) == hash(__value)
-
-    def __repr__(self):
-        return str(self)
-
-BOARD_SIZE = 6
+# Mini-Game is a 6x6 board with one boat of lengths 5, 4, and 3 that may not touch
+CONFIG = BoardConfig(6, (5, 4, 3), "diagonal")
+BOARD_SIZE = CONFIG.size
+BOAT_LENGTHS = CONFIG.boat_lengths
 
 # ----------------------------------------- Propositions ----------------------------------------- 
 @proposition(E)
 class Boat(Hashable):
-    def __init__(self, coords:tuple, length:int, orientation:str):
+    __slots__ = ("coords", "length", "orientation", "mask", "halo")
+
+    def __init__(self, coords:tuple, length:int, orientation:str, config:BoardConfig=CONFIG):
         self.coords = coords
         self.length = length
         self.orientation = orientation
+        # bitmasks of the boat and of the boat plus its surrounding cells
+        self.mask = coords_to_mask(coords, config.size)
+        self.halo = halo_mask(coords, config.size, config.adjacency)
+        self._set_key(self.coords, self.length, self.orientation)
 
     def __str__(self):
-        boat_coords = ""
-        for coord in self.coords:
-            boat_coords+=(f"({coord[0]},{coord[1]}),")
-        boat_coords.rstrip(",")
+        boat_coords = "".join(f"({r},{c})," for r, c in self.coords)
         return f"{boat_coords} + {self.length} + {self.orientation}"
     
 @proposition(E)
 class Game(Hashable):
+    __slots__ = ("boats", "mask")
+
     def __init__(self, boats:tuple):
         self.boats = boats
+        # every cell covered by one of the boats, for cell lookups
+        self.mask = 0
+        for boat in boats:
+            self.mask |= boat.mask
+        self._set_key(self.boats)
 
     def __str__(self):
-        game = ""
-        for boat in self.boats:
-            game+=(f"({boat}, ")
-        game.rstrip(", ")
-        game+=")"
-        return f"{game}"
+        return "".join(f"({boat}, " for boat in self.boats) + ")"
 
 @proposition(E)
 class Guess(Hashable):
+    __slots__ = ("coords",)
+
     def __init__(self, coords:tuple):
         self.coords = coords
+        self._set_key(self.coords)
 
     def __str__(self):
         return f"{self.coords}"
     
 @proposition(E)
 class Hit(Hashable):
+    __slots__ = ("coords",)
+
     def __init__(self, coords:tuple):
         self.coords = coords
+        self._set_key(self.coords)
 
     def __str__(self):
         return f"{self.coords}"
-    
-@proposition(E)
-class Around(Hashable):
-    def __init__(self, boat1:Boat, boat2:Boat):
-        self.boat1 = boat1
-        self.boat2 = boat2
-
-    def __str__(self):
-        return f"({self.boat1} (-) {self.boat2})"
 
 # Create the propositions
-def create_coords(length, orientation, board_size):
-    boats = []
-
-    if orientation == "vertical":
-        for start in range((board_size+1)-length):
-            for r in range(board_size):
-                temp_coords = []
-                for c in range(length):
-                    temp_coords.append((r,c+start))
-                coords = tuple(temp_coords)
-                boats.append(Boat(coords, length, orientation))
-
-    elif orientation == "horizontal":
-        for start in range((board_size+1)-length):
-            for r in range(board_size):
-                temp_coords = []
-                for c in range(length):
-                    temp_coords.append((r,c+start))
-                coords = tuple(temp_coords)
-                boats.append(Boat(coords, length, orientation))
-    
-    return boats
+def create_coords(length, orientation, config=CONFIG):
+    return [boat for boat in get_boats(length, config) if boat.orientation == orientation]
+
+
+# The boats and games are only built the first time something asks for them,
+# and are cached per board configuration, so importing this file stays cheap.
+# There is one Boat per placement of the shared placement table, in table
+# order, so the index of a boat in get_all_boats is its placement id.
+@lru_cache(maxsize=None)
+def get_all_boats(config=CONFIG):
+    table = placement_table(config)
+    return tuple(Boat(table.coords[i], table.lengths[i], table.orientations[i], config) for i in range(len(table)))
+
 
-# Boats by size and orientation
-all_boats_5_horizontal = create_coords(5, "horizontal", BOARD_SIZE)
-all_boats_5_vertical = create_coords(5, "vertical", BOARD_SIZE)
-all_boats_4_horizontal = create_coords(4, "horizontal", BOARD_SIZE)
-all_boats_4_vertical = create_coords(4, "vertical", BOARD_SIZE)
-all_boats_3_horizontal = create_coords(3, "horizontal", BOARD_SIZE)
-all_boats_3_vertical = create_coords(3, "vertical", BOARD_SIZE)
-# all_boats += create_coords(2, "horizontal", BOARD_SIZE)
-# all_boats += create_coords(2, "vertical", BOARD_SIZE)
+def get_boats(length, config=CONFIG):
+    all_boats = get_all_boats(config)
+    return [all_boats[i] for i in placement_table(config).by_length[length]]
 
-# Boats by size
-all_boats_5 = all_boats_5_horizontal + all_boats_5_vertical
-all_boats_4 = all_boats_4_horizontal + all_boats_4_vertical
-all_boats_3 = all_boats_3_horizontal + all_boats_3_vertical
 
-# All the boats
-all_boats = all_boats_5 + all_boats_4 + all_boats_3
+def iter_games(config=CONFIG):
+    # Only the games whose boats are separated, found by backtracking: a boat
+    # that runs into the halo of the boats already placed is skipped right away
+    all_boats = get_all_boats(config)
+    for game in placement_table(config).iter_games():
+        yield Game(tuple(all_boats[i] for i in game))
 
-# Mini-Game will have one boat of lengths 5, 4, and 3
-all_games = []
 
-# there is only one boat of length 5,4, and 3 in each game
-for boat1 in all_boats_5:
-    for boat2 in all_boats_4:
-        for boat3 in all_boats_3:
-            all_games.append(Game(tuple([boat1,boat2,boat3])))
+@lru_cache(maxsize=None)
+def get_all_games(config=CONFIG):
+    return list(iter_games(config))
 
 
 # ----------------------------------------- Propositions ----------------------------------------- 
-def build_theory():
-    # Define when a boat is around
-    for boat1 in all_boats:
-        for boat2 in all_boats:
-            # look at all the coords in the first board
-            if boat1.orientation == "vertical":
-                # for every coord in boat1 if any of the following are in boat2:
-                # check around first coord (not the bottom side)
-                possible = []
-                start = boat1.coords[0]
-                for j in range (start[1]-1,start[1]+2):
-                    i = start[0]-1
-                    if 0<=i< BOARD_SIZE and 0<=j<BOARD_SIZE:
-                        possible.append((i,j))
-
-                # check left and right of the middle coords
-                for coord in boat1.coords:
-                    for i in range(coord[0]-1, coord[0]+2):
-                        if 0<= i <BOARD_SIZE:
-                            possible.append((i,coord[1]))
-
-                # check around last coord (not the top side)
-                end = boat1.coords[-1]
-                for j in range (end[1]-1,end[1]+2):
-                    i = end[0]+1
-                    if 0<=i< BOARD_SIZE and 0<=j<BOARD_SIZE:
-                        possible.append((i,j))
-
-                # once found decalre that they are around and break
-                for coord in boat2.coords:
-                    if coord in possible:
-                        E.add_constraint(Around(boat1,boat2))
-                        E.add_constraint(Around(boat2,boat1))
-                        break
-
-
-            elif boat1.orientation == "horizontal":
-                # for every coord in boat1 if any of the following are in boat2:
-                # check around first coord (not the right side)
-                possible = []
-                start = boat1.coords[0]
-                for i in range(start[0]-1, start[0]+2):
-                    j = start[1]-1
-                    if 0<=i< BOARD_SIZE and 0<=j<BOARD_SIZE:
-                        possible.append((i,j))
-
-                # check up and down of the middle coords
-                for coord in boat1.coords:
-                    for j in range (coord[1]-1,coord[1]+2):
-                        if 0<=j<BOARD_SIZE:
-                            possible.append((coord[0],j))
-
-                # check around last coord (not the left side)
-                end = boat1.coords[-1]
-                for i in range(end[0]-1, end[0]+2):
-                    j = end[1]+1
-                    if 0<=i< BOARD_SIZE and 0<=j<BOARD_SIZE:
-                        possible.append((i,j))
-                
-                # once found decalre that they are around and break ... else they are not around
-                for coord in boat2.coords:
-                    if coord in possible:
-                        E.add_constraint(Around(boat1,boat2))
-                        E.add_constraint(Around(boat2,boat1))
-                        break
-        
-
-    # add a constraint that a game cannot exist where any of the three boats are around
-    for boat1 in all_boats_5:
-        for boat2 in all_boats_4:
-            for boat3 in all_boats_3:
-                # no boats should be around each other
-                E.add_constraint(Or([Around(boat1,boat2), Around(boat1,boat3),
-                                     Around(boat2,boat1), Around(boat2,boat3),
-                                     Around(boat3,boat1), Around(boat3,boat2)]) >> ~Game((boat1,boat2,boat3)))
+def build_theory(config=CONFIG):
+    if config.size > ENUMERATE_MAX_SIZE:
+        raise ValueError(f"The Game-atom theory lists every game, too many on a {config.size}x{config.size} board; "
+                         "use compact.build_compact_theory")
+    E._custom_constraints.clear()
+    # the game is one whose boats are not around each other; those are listed by
+    # backtracking (separation is checked there with the boats' halo masks), so
+    # the product of every ship's placements is never built
+    E.add_constraint(Or(get_all_games(config)))
     return E
 
 # ----------------------------------------- End of Propositions ----------------------------------------- 
@@ -282,9 +197,9 @@ def play_game(possible_games, score, game):
             hit = True
     
     # Fix this
-    # for boat1 in all_boats_5:
-    #     for boat2 in all_boats_4:
-    #         for boat3 in all_boats_3:
+    # for boat1 in get_boats(5):
+    #     for boat2 in get_boats(4):
+    #         for boat3 in get_boats(3):
     #             if (x,y) in boat1.coords or (x,y) in boat2.coords or (x,y) in boat3.coords:
     #                 E.add_constraint(~Game((boat1,boat2,boat3)))
     
@@ -345,9 +260,9 @@ def play_game(possible_games, score, game):
 
     satisfied = E.compile().solve()
     temp = []
-    for boat1 in all_boats_5:
-        for boat2 in all_boats_4:
-            for boat3 in all_boats_3:
+    for boat1 in get_boats(5):
+        for boat2 in get_boats(4):
+            for boat3 in get_boats(3):
                 if satisfied[Game((boat1,boat2,boat3))]:
                     temp.append(Game((boat1,boat2,boat3)))
     it = initialize_board(temp)
@@ -392,9 +307,9 @@ if __name__ == "__main__":
     satisfied = T.solve()
     pp.pprint(satisfied)
     # possible_games = []
-    # for boat1 in all_boats_5:
-    #     for boat2 in all_boats_4:
-    #         for boat3 in all_boats_3:
+    # for boat1 in get_boats(5):
+    #     for boat2 in get_boats(4):
+    #         for boat3 in get_boats(3):
     #             if satisfied[Game((boat1,boat2,boat3))]:
     #                 possible_games.append(Game((boat1,boat2,boat3)))
 
@@ -0,0 +1,70 @@
+"""
+Uniform random fleets.
+
+A hidden board should be a uniform draw from the valid fleets. Placing boats
+one by one at random positions and starting over on a clash is not: the
+first boats are placed on an empty board, so the order of placement skews
+which fleets come out.
+
+When the valid games of a board can be listed, a draw is a single random
+index into that list. On larger boards each boat gets an independent uniform
+placement and the whole fleet is redrawn on a clash; every ordered choice of
+placements is equally likely, so the accepted fleets are uniform too. Either
+way a draw is a handful of bitmask operations, with no recursion.
+"""
+import random
+from functools import lru_cache
+
+from bitboard import DEFAULT_CONFIG, placement_table
+
+# boards up to this size have their games listed for O(1) draws
+ENUMERATE_MAX_SIZE = 7
+
+
+class FleetSampler:
+    def __init__(self, config=DEFAULT_CONFIG, enumerate_games=None):
+        self.config = config
+        self.table = placement_table(config)
+        if enumerate_games is None:
+            enumerate_games = config.size <= ENUMERATE_MAX_SIZE
+        self.games = self.table.games() if enumerate_games else None
+        self._ships = [self.table.by_length[length] for length in self.table.boat_lengths]
+
+    def sample(self, rng=random):
+        """
+        A uniformly random valid game, as a tuple of placement ids.
+        """
+        if self.games is not None:
+            return self.games[rng.randrange(len(self.games))]
+
+        masks, halos = self.table.masks, self.table.halos
+        while True:
+            game = []
+            blocked = 0
+            for candidates in self._ships:
+                i = rng.choice(candidates)
+                if masks[i] & blocked:
+                    break
+                game.append(i)
+                blocked |= halos[i]
+            else:
+                return tuple(game)
+
+    def sample_board(self, rng=random):
+        """
+        A uniformly random valid game as a 0/1 board.
+        """
+        size = self.config.size
+        board = [[0] * size for _ in range(size)]
+        for i in self.sample(rng):
+            for r, c in self.table.coords[i]:
+                board[r][c] = 1
+        return board
+
+
+@lru_cache(maxsize=None)
+def fleet_sampler(config=DEFAULT_CONFIG):
+    """
+    Shared sampler for a board configuration.
+    """
+    return FleetSampler(config)
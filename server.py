@@ -0,0 +1,239 @@
+"""
+Multi-session game server.
+
+An asyncio TCP server speaking JSON lines: every request is one JSON object
+on a line and gets one JSON object back. A connection can run any number of
+games at once; each game is a ``Session`` with its own hidden fleet and
+``GameState``. The placement table, the game space and the compiled base
+theory are built once when the server starts and shared by every session.
+
+Work that touches the game space (narrowing after a guess, the density
+board, picking a move, a SAT model) runs in a thread pool, so the event loop
+keeps serving other connections while a move is worked out. A game belongs
+to the connection that created it and a connection's requests are handled
+one at a time, so no two requests ever touch one session at once. The
+threads share the GIL: NumPy calls release it, but the pure-Python parts of
+a move do not, so solver work does not scale past one core. Run one server
+per core for that.
+
+    {"op": "new"}                              -> {"game": 1, "size": 6, "boat_lengths": [5, 4, 3]}
+    {"op": "guess", "game": 1, "x": 2, "y": 3} -> {"hit": true, "sunk": 0, "candidates": 684, "moves": 1, "won": false}
+    {"op": "heatmap", "game": 1}               -> {"candidates": 684, "board": [[...], ...]}
+    {"op": "suggest", "game": 1, "strategy": "density"} -> {"x": 2, "y": 2}
+    {"op": "solve", "game": 1}                 -> {"fleet": [[[0, 0], [0, 1], ...], ...]}
+    {"op": "close", "game": 1}                 -> {"closed": 1}
+
+Errors come back as {"error": "..."}.
+
+    python server.py --port 8765
+"""
+import asyncio
+import itertools
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bitboard import DEFAULT_CONFIG, HiddenFleet, placement_table
+from compact import decode_fleet
+from game_state import GameState, game_space
+from sampling import fleet_sampler
+from strategy import STRATEGIES
+from theory_cache import compiled_theory
+
+
+class Session:
+    def __init__(self, game_id, config, rng):
+        self.id = game_id
+        self.config = config
+        self.fleet = HiddenFleet(placement_table(config), fleet_sampler(config).sample(rng))
+        self.player_board = [[0] * config.size for _ in range(config.size)]
+        self.state = GameState(config)
+        self.moves = 0
+        # milliseconds the last guess took to narrow the game state and solver
+        self.last_guess_ms = 0.0
+        # (x, y, length) of every guess that sank a boat
+        self.sinks = []
+        self.logged_game = None
+        self._strategies = {}
+        self._solver = None
+
+    def guess(self, x, y):
+        size = self.config.size
+        if self.fleet.all_sunk():
+            raise ValueError("every boat is already sunk")
+        if not all(isinstance(v, int) and not isinstance(v, bool) and 0 <= v < size for v in (x, y)):
+            raise ValueError(f"({x}, {y}) is not a cell of a {size}x{size} board")
+        if self.player_board[x][y] != 0:
+            raise ValueError(f"({x}, {y}) was already guessed")
+
+        start = time.perf_counter()
+        is_hit, sunk = self.fleet.fire(x, y)
+        self.player_board[x][y] = 'H' if is_hit else 'M'
+        self.state.process_guess(x, y, is_hit)
+        if sunk:
+            self.state.process_sunk(x, y, sunk)
+            self.sinks.append((x, y, sunk))
+        if self._solver is not None:
+            self._solver.observe(x, y, is_hit)
+            if sunk:
+                self._solver.observe_sunk(x, y, sunk)
+        self.moves += 1
+        self.last_guess_ms = 1000 * (time.perf_counter() - start)
+        return {"hit": is_hit, "sunk": sunk, "candidates": len(self.state), "moves": self.moves,
+                "won": self.fleet.all_sunk()}
+
+    def heatmap(self):
+        return {"candidates": len(self.state), "board": self.state.occupancy().tolist()}
+
+    def suggest(self, name):
+        if name not in STRATEGIES:
+            raise ValueError(f"Unknown strategy {name!r}, expected one of {sorted(STRATEGIES)}")
+        if name not in self._strategies:
+            self._strategies[name] = STRATEGIES[name]()
+        x, y = self._strategies[name](self.player_board, self.state)
+        return {"x": x, "y": y}
+
+    def solve(self):
+        if self._solver is None:
+            from solver_session import SolverSession
+            self._solver = SolverSession(self.config)
+            for x, y, is_hit in self.state.guesses:
+                self._solver.observe(x, y, is_hit)
+            for x, y, sunk in self.sinks:
+                self._solver.observe_sunk(x, y, sunk)
+        model = self._solver.solve()
+        if model is None:
+            return {"fleet": None}
+        table = placement_table(self.config)
+        return {"fleet": [list(map(list, table.coords[i])) for i in decode_fleet(model, self.config)]}
+
+    def close(self):
+        if self._solver is not None:
+            self._solver.close()
+
+
+class GameServer:
+    def __init__(self, config=DEFAULT_CONFIG, workers=None, seed=None, log=None):
+        self.config = config
+        self.executor = ThreadPoolExecutor(workers)
+        self.rng = random.Random(seed)
+        self.log = log
+        self.sessions = {}
+        self._ids = itertools.count(1)
+
+    def _warm(self):
+        table = placement_table(self.config)
+        game_space(table)
+        fleet_sampler(self.config)
+        compiled_theory(self.config)
+
+    async def start(self, host="127.0.0.1", port=8765):
+        await asyncio.get_running_loop().run_in_executor(self.executor, self._warm)
+        return await asyncio.start_server(self.handle, host, port)
+
+    async def handle(self, reader, writer):
+        owned = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("a request is a JSON object")
+                    response = await self.dispatch(request, owned)
+                except (ValueError, KeyError, TypeError) as e:
+                    response = {"error": str(e)}
+                writer.write((json.dumps(response, separators=(",", ":")) + "\n").encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            for game_id in owned:
+                self._close(game_id)
+            writer.close()
+
+    async def dispatch(self, request, owned):
+        op = request.get("op")
+        if op == "new":
+            session = Session(next(self._ids), self.config, self.rng)
+            self.sessions[session.id] = session
+            owned.add(session.id)
+            if self.log is not None:
+                session.logged_game = self.log.start_game(self.config, session.fleet.board())
+            return {"game": session.id, "size": self.config.size, "boat_lengths": list(self.config.boat_lengths)}
+
+        game_id = request.get("game")
+        if game_id not in owned:
+            raise ValueError(f"No game {game_id!r} on this connection")
+        session = self.sessions[game_id]
+
+        if op == "close":
+            owned.discard(game_id)
+            self._close(game_id)
+            return {"closed": game_id}
+        if op == "guess":
+            x, y = request["x"], request["y"]
+            response = await self._run(session.guess, x, y)
+            if self.log is not None:
+                self.log.guess(session.logged_game, x, y, response["hit"], response["sunk"], session.last_guess_ms)
+                if response["won"]:
+                    self.log.end_game(session.logged_game, session.moves)
+            return response
+        if op == "heatmap":
+            return await self._run(session.heatmap)
+        if op == "suggest":
+            return await self._run(session.suggest, request.get("strategy", "density"))
+        if op == "solve":
+            return await self._run(session.solve)
+        raise ValueError(f"Unknown op {op!r}")
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    def _close(self, game_id):
+        session = self.sessions.pop(game_id, None)
+        if session is not None:
+            if self.log is not None and not session.fleet.all_sunk():
+                self.log.end_game(session.logged_game, session.moves, abandoned=True)
+            session.close()
+
+    def close(self):
+        for game_id in list(self.sessions):
+            self._close(game_id)
+        self.executor.shutdown()
+
+
+async def main(host, port, workers, seed, log_path):
+    log = None
+    if log_path:
+        from gamelog import GameLog
+        log = GameLog(log_path)
+    server = GameServer(workers=workers, seed=seed, log=log)
+    tcp_server = await server.start(host, port)
+    print(f"Serving on {', '.join(str(sock.getsockname()) for sock in tcp_server.sockets)}")
+    try:
+        async with tcp_server:
+            await tcp_server.serve_forever()
+    finally:
+        server.close()
+        if log is not None:
+            log.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve many Battleship games over TCP JSON lines.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=None, help="threads for solver work")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--log", help="append every game to this JSON-lines event log")
+    args = parser.parse_args()
+    try:
+        asyncio.run(main(args.host, args.port, args.workers, args.seed, args.log))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,187 @@
+"""
+Headless self-play.
+
+``simulate`` plays whole games without a terminal: hidden fleets are drawn
+by the fleet sampler and every guess comes from a strategy, a callable that
+takes the player board (0 for unknown, 'H' or 'M') and the ``GameState`` of
+the game and returns the next (row, column); see strategy.py. Sunk boats
+are announced to the game state as in the interactive game. The game space and its index are
+built once per configuration and shared by every game, so a game only costs
+its guesses. Nothing is printed; the result is the distribution of the number
+of moves needed to sink the whole fleet.
+
+``simulate_parallel`` splits the games into chunks over a process pool. The
+placement table and game space are built in the parent before the pool
+starts, so forked workers share them copy-on-write; the strategy and
+configuration go to each worker once, and a task is just (seed, games). Each
+chunk has its own seed drawn from the master seed, so the result only depends
+on the seed and the chunk size, not on the number of workers or the order in
+which chunks finish. With ``processes=1`` the same chunks are played in
+this process, so one process and many give the same distribution for a
+seed. Strategies that use randomness should have a ``reseed(seed)`` method,
+called at the start of every chunk.
+"""
+import multiprocessing
+import random
+import time
+from collections import Counter
+
+import instrument
+from bitboard import DEFAULT_CONFIG, HiddenFleet, placement_table
+from game_state import GameState, game_space
+from gamelog import GameLog
+from sampling import fleet_sampler
+from strategy import STRATEGIES
+
+
+def play(strategy, hidden_fleet, config=DEFAULT_CONFIG, log=None):
+    """
+    Play one game against a ``HiddenFleet`` and return the number of moves.
+    With a ``GameLog``, the game and every guess are appended to it.
+    """
+    size = config.size
+    player_board = [[0] * size for _ in range(size)]
+    state = GameState(config)
+    moves = 0
+    game = log.start_game(config, hidden_fleet.board()) if log is not None else None
+    while not hidden_fleet.all_sunk():
+        start = time.perf_counter()
+        with instrument.timer("strategy.choose"):
+            x, y = strategy(player_board, state)
+        elapsed = time.perf_counter() - start
+        if player_board[x][y] != 0:
+            raise ValueError(f"strategy guessed ({x}, {y}) twice")
+        is_hit, sunk_length = hidden_fleet.fire(x, y)
+        player_board[x][y] = 'H' if is_hit else 'M'
+        state.process_guess(x, y, is_hit)
+        if sunk_length:
+            state.process_sunk(x, y, sunk_length)
+        if log is not None:
+            log.guess(game, x, y, is_hit, sunk_length, 1000 * elapsed)
+        moves += 1
+    if log is not None:
+        log.end_game(game, moves)
+    return moves
+
+
+def simulate(strategy, n_games, seed=None, config=DEFAULT_CONFIG, log=None):
+    """
+    Play ``n_games`` games with ``strategy`` on boards drawn from ``seed`` and
+    return a Counter of moves-to-win -> number of games.
+    """
+    rng = random.Random(seed)
+    table = placement_table(config)
+    sampler = fleet_sampler(config)
+    distribution = Counter()
+    for _ in range(n_games):
+        hidden_fleet = HiddenFleet(table, sampler.sample(rng))
+        with instrument.timer("simulate.game"):
+            distribution[play(strategy, hidden_fleet, config, log)] += 1
+    return distribution
+
+
+# ----- Parallel -----
+
+_worker = {}
+
+
+def _init_worker(strategy, config):
+    _worker["strategy"] = strategy
+    _worker["config"] = config
+    # no-op after fork; builds the tables once per worker under spawn
+    game_space(placement_table(config))
+
+
+def _run_chunk(strategy, config, task, log=None):
+    seed, n_games = task
+    if hasattr(strategy, "reseed"):
+        strategy.reseed(seed)
+    return simulate(strategy, n_games, seed, config, log)
+
+
+def _play_chunk(task):
+    return _run_chunk(_worker["strategy"], _worker["config"], task)
+
+
+def simulate_parallel(strategy, n_games, seed=None, config=DEFAULT_CONFIG, processes=None, chunk_size=1000,
+                      progress=None, log=None):
+    """
+    ``simulate`` over a process pool. Chunk results are merged as they arrive;
+    ``progress``, if given, is called with the running distribution after
+    every chunk. A ``GameLog`` can only be written with ``processes=1``.
+    """
+    rng = random.Random(seed)
+    tasks = []
+    for start in range(0, n_games, chunk_size):
+        tasks.append((rng.getrandbits(64), min(chunk_size, n_games - start)))
+
+    # build the shared tables before forking
+    game_space(placement_table(config))
+    distribution = Counter()
+    if processes == 1:
+        for task in tasks:
+            distribution.update(_run_chunk(strategy, config, task, log))
+            if progress is not None:
+                progress(distribution)
+        return distribution
+    if log is not None:
+        raise ValueError("a game log needs processes=1")
+
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    with context.Pool(processes, initializer=_init_worker, initargs=(strategy, config)) as pool:
+        for result in pool.imap_unordered(_play_chunk, tasks):
+            distribution.update(result)
+            if progress is not None:
+                progress(distribution)
+    return distribution
+
+
+def summarize(distribution):
+    """
+    Number of games, mean, median, min and max moves of a distribution.
+    """
+    n_games = sum(distribution.values())
+    moves = sorted(distribution.elements())
+    return {
+        "games": n_games,
+        "mean": sum(moves) / n_games,
+        "median": moves[n_games // 2],
+        "min": moves[0],
+        "max": moves[-1],
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Play games headless and report moves to win.")
+    parser.add_argument("n_games", type=int, nargs="?", default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--strategy", choices=sorted(STRATEGIES), default="density")
+    parser.add_argument("--processes", type=int, default=1, help="0 for one per core")
+    parser.add_argument("--instrument", action="store_true", help="time the phases of every move")
+    parser.add_argument("--instrument-json", help="write the instrumentation report here")
+    parser.add_argument("--log", help="append every game to this JSON-lines event log")
+    args = parser.parse_args()
+    if args.log and args.processes != 1:
+        parser.error("--log needs --processes 1")
+    if args.instrument or args.instrument_json:
+        instrument.enable()
+
+    strategy = STRATEGIES[args.strategy]()
+    processes = args.processes or None
+    if args.log:
+        with GameLog(args.log) as log:
+            distribution = simulate_parallel(strategy, args.n_games, args.seed, processes=processes, log=log)
+    else:
+        distribution = simulate_parallel(strategy, args.n_games, args.seed, processes=processes)
+    print(summarize(distribution))
+    print(dict(sorted(distribution.items())))
+    if getattr(strategy, "cache", None) is not None and args.processes == 1:
+        print(strategy.cache.stats())
+    if instrument.enabled():
+        # workers keep their own numbers, so this only covers this process
+        print(instrument.summary())
+        if args.instrument_json:
+            instrument.dump_json(args.instrument_json)
@@ -0,0 +1,135 @@
+"""
+Incremental SAT solving across the turns of a game.
+
+A ``SolverSession`` loads the cached base theory of a board once. Each guess
+is recorded as an observation on a ``Hit`` atom and passed to the solver as
+an assumption, so the clause database (and everything the solver learned on
+earlier turns) is reused; nothing is re-encoded and the theory does not grow
+as the game goes on.
+
+With PySAT (``pip install python-sat``) the session keeps one live solver.
+Without it, every query falls back to the configured nnf backend on the base
+theory plus unit clauses, which is still a single CNF solve per turn.
+Either way, a model that still agrees with every observation is returned
+again without calling the solver at all.
+
+A sunk boat is not a single literal (the boat can be any of the ships of its
+length), so it is added as a clause over the ``Place`` atoms it can be. The
+session belongs to one game, so the clause can stay for good.
+"""
+from nnf import And, Or, Var
+
+import instrument
+from bitboard import DEFAULT_CONFIG
+from compact import Hit, sunk_places
+from theory_cache import compiled_theory, with_observations
+
+try:
+    from pysat.solvers import Solver
+except ImportError:
+    Solver = None
+
+
+class SolverSession:
+    def __init__(self, config=DEFAULT_CONFIG, solver_name="cadical153"):
+        self.config = config
+        self.theory = compiled_theory(config)
+        self.guesses = []
+        # ships announced sunk, as (length, candidate placement ids) pairs
+        self.sunk = []
+        self._sunk_clauses = []
+        self._observations = {}
+        self._model = None
+        self._solver = None
+
+        if Solver is not None:
+            self._names = sorted(self.theory.vars(), key=str)
+            self._ids = {name: i + 1 for i, name in enumerate(self._names)}
+            self._next_id = len(self._names) + 1
+            self._solver = Solver(name=solver_name, bootstrap_with=[
+                [self._ids[var.name] if var.true else -self._ids[var.name] for var in clause]
+                for clause in self.theory
+            ])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._solver is not None:
+            self._solver.delete()
+            self._solver = None
+
+    def observe(self, x, y, is_hit):
+        hit = Hit((x, y))
+        self.guesses.append((x, y, is_hit))
+        self._observations[hit] = is_hit
+        if self._model is not None and self._model[hit] != is_hit:
+            self._model = None
+
+    def observe_sunk(self, x, y, length):
+        """
+        The hit at (x, y) sank a boat of ``length``; see ``compact.sunk_places``.
+        """
+        candidates, places = sunk_places(self.config, self.guesses, x, y, length)
+        self.sunk.append((length, tuple(candidates)))
+        clause = Or([Var(place) for place in places])
+        self._sunk_clauses.append(clause)
+        if self._model is not None and not any(self._model[var.name] for var in clause):
+            self._model = None
+        if self._solver is not None:
+            self._solver.add_clause([self._ids[var.name] for var in clause])
+
+    def _theory(self):
+        T = with_observations(self.theory, self.guesses)
+        return And(list(T.children) + self._sunk_clauses)
+
+    def _assumptions(self):
+        return [self._ids[hit] if is_hit else -self._ids[hit] for hit, is_hit in self._observations.items()]
+
+    def _decode(self, literals):
+        return {self._names[abs(lit) - 1]: lit > 0 for lit in literals if abs(lit) <= len(self._names)}
+
+    def solve(self):
+        """
+        A model of the base theory that agrees with every observation, or None.
+        """
+        if self._model is not None:
+            instrument.count("solve.reused_model")
+            return self._model
+
+        with instrument.timer("solve"):
+            if self._solver is not None:
+                if self._solver.solve(assumptions=self._assumptions()):
+                    self._model = self._decode(self._solver.get_model())
+            else:
+                self._model = self._theory().solve()
+        return self._model
+
+    def satisfiable(self):
+        return self.solve() is not None
+
+    def models(self):
+        """
+        Yield distinct models that agree with the observations. Each model is
+        blocked behind a fresh activation literal, which is switched off when
+        the generator finishes, so later queries see the full theory again.
+        """
+        if self._solver is None:
+            yield from self._theory().models()
+            return
+
+        activation = self._next_id
+        self._next_id += 1
+        try:
+            while self._solver.solve(assumptions=self._assumptions() + [activation]):
+                model = self._decode(self._solver.get_model())
+                yield model
+                # block this fleet: at least one chosen placement has to change
+                chosen = [self._ids[name] for name, value in model.items()
+                          if value and name.__class__.__name__ == "Place"]
+                self._solver.add_clause([-activation] + [-i for i in chosen])
+        finally:
+            self._solver.add_clause([-activation])
@@ -0,0 +1,182 @@
+"""
+Targeting strategies for a computer player.
+
+A strategy is called with the player board (0 for a cell not guessed yet,
+'H' or 'M') and the ``GameState`` holding the games still consistent with
+the guesses, and returns the next (row, column) to fire at. Subclasses of
+``Strategy`` only implement ``choose``; any other callable with the same
+signature works in the simulator as well.
+
+The board-reading strategies score every cell at once, from the density board
+of the surviving games or from popcounts of the cell bitsets, so a move costs
+the same whatever the strategy.
+"""
+import random
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+from density import row_popcounts
+from game_state import cell_bitsets
+from transposition import TranspositionCache, solve_position
+
+
+class Strategy(ABC):
+    name = "strategy"
+
+    def __call__(self, player_board, state):
+        return self.choose(player_board, state)
+
+    @abstractmethod
+    def choose(self, player_board, state):
+        """
+        The next (row, column) to fire at.
+        """
+
+    def reseed(self, seed):
+        pass
+
+
+def open_cells(player_board):
+    size = len(player_board)
+    return [(r, c) for r in range(size) for c in range(size) if player_board[r][c] == 0]
+
+
+def open_mask(player_board):
+    """
+    Bool board, True for every cell that has not been guessed.
+    """
+    return np.array([[value == 0 for value in row] for row in player_board])
+
+
+def best_cell(scores, player_board):
+    """
+    The open cell with the highest score; ties go to the first in row order.
+    """
+    scores = np.where(open_mask(player_board), scores, -np.inf)
+    return tuple(int(i) for i in np.unravel_index(np.argmax(scores), scores.shape))
+
+
+# ----- Strategies -----
+
+class RandomStrategy(Strategy):
+    """
+    Guess a uniformly random cell that has not been guessed yet.
+    """
+    name = "random"
+
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+
+    def reseed(self, seed):
+        self.rng.seed(seed)
+
+    def choose(self, player_board, state):
+        return self.rng.choice(open_cells(player_board))
+
+
+class ParityHuntStrategy(Strategy):
+    """
+    Classic hunt and target. While no hit is left unexplored, fire at random
+    cells of one parity class: with the shortest boat of length ``n``, every
+    boat covers a cell with (row + column) % n == 0. After a hit, fire at the
+    open neighbours of hits, preferring cells in line with two hits. Hits on
+    sunk boats and the known water around them are left alone.
+    """
+    name = "parity"
+
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+
+    def reseed(self, seed):
+        self.rng.seed(seed)
+
+    def choose(self, player_board, state):
+        size = len(player_board)
+        sunk_mask = 0
+        for length, candidates in state.sunk:
+            for i in candidates:
+                sunk_mask |= state.table.masks[i]
+
+        def live_hit(x, y):
+            return player_board[x][y] == 'H' and not sunk_mask >> (x * size + y) & 1
+
+        cells = [(r, c) for r, c in open_cells(player_board) if not state.water_mask >> (r * size + c) & 1]
+        in_line = []
+        beside = []
+        for r, c in cells:
+            neighbours = [(r + dr, c + dc) for dr, dc in ((-1, 0), (1, 0), (0, -1), (0, 1))]
+            hits = [(x, y) for x, y in neighbours if 0 <= x < size and 0 <= y < size and live_hit(x, y)]
+            if not hits:
+                continue
+            beside.append((r, c))
+            for x, y in hits:
+                x2, y2 = 2 * x - r, 2 * y - c
+                if 0 <= x2 < size and 0 <= y2 < size and live_hit(x2, y2):
+                    in_line.append((r, c))
+                    break
+        if in_line:
+            return self.rng.choice(in_line)
+        if beside:
+            return self.rng.choice(beside)
+
+        step = min(state.config.boat_lengths)
+        hunt = [(r, c) for r, c in cells if (r + c) % step == 0]
+        return self.rng.choice(hunt or cells or open_cells(player_board))
+
+
+class DensityStrategy(Strategy):
+    """
+    Fire at the open cell that has a boat in the most surviving games, i.e.
+    the highest hit probability. With a ``TranspositionCache`` the count,
+    density board and move of every position are kept there; either way the
+    move is picked in the canonical frame of the position, so the cache does
+    not change the game.
+    """
+    name = "density"
+
+    def __init__(self, cache=None):
+        self.cache = cache
+
+    def choose(self, player_board, state):
+        def solve():
+            density = state.occupancy()
+            return len(state), density, density
+
+        if self.cache is None:
+            return solve_position(state, solve).move
+        return self.cache.position(state, solve).move
+
+
+class EntropyStrategy(Strategy):
+    """
+    Fire at the open cell whose result is least predictable. A guess splits
+    the ``n`` surviving games into the ``k`` with a boat on the cell and the
+    ``n - k`` without, so the expected information gained is
+    log n - (k log k + (n - k) log (n - k)) / n: the binary entropy of the hit
+    probability k / n, largest for the cell that splits the survivors most
+    evenly. Every ``k`` comes from one AND and popcount of the cell bitsets
+    against the survivors. The count, density board and move of every
+    position are kept in a ``TranspositionCache``.
+    """
+    name = "entropy"
+
+    def __init__(self, cache=None):
+        self.cache = TranspositionCache() if cache is None else cache
+
+    def choose(self, player_board, state):
+        return self.cache.position(state, lambda: self._solve(player_board, state)).move
+
+    def _solve(self, player_board, state):
+        n = len(state)
+        k = row_popcounts(cell_bitsets(state.table) & state.alive_bits())
+        with np.errstate(divide="ignore", invalid="ignore"):
+            remaining = np.nan_to_num(k * np.log2(k)) + np.nan_to_num((n - k) * np.log2(n - k))
+        gain = (np.log2(max(n, 1)) - remaining / max(n, 1)).reshape(state.board_size, state.board_size)
+        if not gain[open_mask(player_board)].any():
+            # nothing left to learn, so fire at the certain hits
+            gain = k.reshape(state.board_size, state.board_size)
+        return n, k.reshape(state.board_size, state.board_size), gain
+
+
+STRATEGIES = {cls.name: cls for cls in (RandomStrategy, ParityHuntStrategy, DensityStrategy, EntropyStrategy)}
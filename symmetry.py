@@ -0,0 +1,109 @@
+"""
+Dihedral symmetries of the board.
+
+A square board has eight symmetries (four rotations, each with or without a
+reflection), and none of them changes which fleets are legal: they map boat
+lengths, separation and the adjacency halo onto themselves. So a position
+(hits, misses and sunk boats) is only worth solving once per orbit.
+
+Transform ``t`` is stored as a permutation of cell indices (``perms[t][cell]``
+is where ``cell`` goes), and as a permutation of placement ids for a given
+placement table. Results worked out for a transformed position are mapped
+back with ``inverse[t]``; see ``canonical_position_key`` in transposition.py.
+
+Only positions are canonicalised. The game space keeps every game, not one
+per orbit: a guess narrows the survivors game by game, and after the first
+guess the survivors are no longer closed under the symmetries, so orbit
+representatives would have to be expanded again on every move.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+from bitboard import placement_table
+
+
+def _transforms(m):
+    return (
+        lambda r, c: (r, c),
+        lambda r, c: (c, m - r),
+        lambda r, c: (m - r, m - c),
+        lambda r, c: (m - c, r),
+        lambda r, c: (m - r, c),
+        lambda r, c: (r, m - c),
+        lambda r, c: (c, r),
+        lambda r, c: (m - c, m - r),
+    )
+
+
+class Symmetry:
+    def __init__(self, size):
+        self.size = size
+        self.perms = []
+        for transform in _transforms(size - 1):
+            perm = []
+            for r in range(size):
+                for c in range(size):
+                    x, y = transform(r, c)
+                    perm.append(x * size + y)
+            self.perms.append(perm)
+        self._arrays = np.array(self.perms)
+
+        self.inverse = []
+        for perm in self.perms:
+            undo = [0] * len(perm)
+            for cell, image in enumerate(perm):
+                undo[image] = cell
+            self.inverse.append(self.perms.index(undo))
+
+    def __len__(self):
+        return len(self.perms)
+
+    def transform_mask(self, mask, t):
+        perm = self.perms[t]
+        image = 0
+        while mask:
+            low = mask & -mask
+            image |= 1 << perm[low.bit_length() - 1]
+            mask ^= low
+        return image
+
+    def transform_cell(self, cell, t):
+        r, c = cell
+        image = self.perms[t][r * self.size + c]
+        return image // self.size, image % self.size
+
+    def transform_board(self, board, t):
+        """
+        The (size, size) array ``board`` moved by transform ``t``.
+        """
+        board = np.asarray(board)
+        image = np.empty(board.size, dtype=board.dtype)
+        image[self._arrays[t]] = board.ravel()
+        return image.reshape(self.size, self.size)
+
+
+@lru_cache(maxsize=None)
+def symmetry(size):
+    return Symmetry(size)
+
+
+# ----- Fleets -----
+
+class FleetSymmetry:
+    """
+    The board symmetries acting on the placements of a table.
+    """
+
+    def __init__(self, table):
+        self.symmetry = symmetry(table.board_size)
+        ids = {mask: i for i, mask in enumerate(table.masks)}
+        self.placement_perms = [
+            [ids[self.symmetry.transform_mask(mask, t)] for mask in table.masks]
+            for t in range(len(self.symmetry))
+        ]
+
+
+@lru_cache(maxsize=None)
+def fleet_symmetry(config):
+    return FleetSymmetry(placement_table(config))
@@ -4,6 +4,18 @@ from bauhaus import Encoding, proposition, constraint, Or, And
 from bauhaus.utils import count_solutions, likelihood
 import string
 import random
+import time
+from functools import lru_cache
+
+from bitboard import BoardConfig, HiddenFleet, coords_to_mask, halo_mask, placement_table
+from propositions import Hashable
+import instrument
+from game_state import GameState
+from gamelog import GameLog
+from sampling import fleet_sampler
+from compact import decode_fleet
+from solver_session import SolverSession
+
 import pprint
 pp = pprint.PrettyPrinter(indent=4)
 
@@ -32,110 +44,97 @@ class BasicPropositions:
         return f"A.{self.data}"
 
 
-class Hashable:
-    def __hash__(self):
-        return hash(str(self))
-
-    def __eq__(self, __value: object) -> bool:
-        return hash(self) == hash(__value)
-
-    def __repr__(self):
-        return str(self)
-
-
-BOARD_SIZE = 6
+# Mini-Game is a 6x6 board with one boat of lengths 5, 4, and 3 that may not touch
+CONFIG = BoardConfig(6, (5, 4, 3), "diagonal")
+BOARD_SIZE = CONFIG.size
+BOAT_LENGTHS = CONFIG.boat_lengths
 # ----------------------------------------- Propositions -----------------------------------------
 @proposition(E)
 class Boat(Hashable):
-    def __init__(self, coords: tuple, length: int, orientation: str):
+    __slots__ = ("coords", "length", "orientation", "mask", "halo")
+
+    def __init__(self, coords: tuple, length: int, orientation: str, config: BoardConfig = CONFIG):
         self.coords = coords
         self.length = length
         self.orientation = orientation
+        # bitmasks of the boat and of the boat plus its surrounding cells
+        self.mask = coords_to_mask(coords, config.size)
+        self.halo = halo_mask(coords, config.size, config.adjacency)
+        self._set_key(self.coords, self.length, self.orientation)
 
     def __str__(self):
-        boat_coords = ""
-        for coord in self.coords:
-            boat_coords += (f"({coord[0]},{coord[1]}),")
-        boat_coords.rstrip(",")
+        boat_coords = "".join(f"({r},{c})," for r, c in self.coords)
         return f"{boat_coords} + {self.length} + {self.orientation}"
 
 
 @proposition(E)
 class Game(Hashable):
+    __slots__ = ("boats", "mask")
+
     def __init__(self, boats:tuple):
         self.boats = boats
+        # every cell covered by one of the boats, for cell lookups
+        self.mask = 0
+        for boat in boats:
+            self.mask |= boat.mask
+        self._set_key(self.boats)
 
     def __str__(self):
-        game = ""
-        for boat in self.boats:
-            game+=(f"({boat}, ")
-        game.rstrip(", ")
-        game+=")"
-        return f"{game}"
+        return "".join(f"({boat}, " for boat in self.boats) + ")"
 
 
 @proposition(E)
 class Guess(Hashable):
+    __slots__ = ("coords",)
+
     def __init__(self, coords: tuple):
         self.coords = coords
+        self._set_key(self.coords)
 
     def __str__(self):
         return f"Guess({self.coords})"
 
 
 # ----------------------------------------- Variables -----------------------------------------
+# Print the occupancy over every consistent game (NumPy) instead of a single SAT model
+DENSITY_MODE = True
+# Append every game to this JSON-lines event log (see gamelog.py), or None
+GAME_LOG_PATH = None
 board_status = [[' ' for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
 guesses = []
-# Mini-Game will have one boat of lengths 5, 4, and 3
-all_games = []
 # ----------------------------------------- Create all variations -----------------------------------------
 
 
-def create_coords(length, orientation, board_size):
-    boats = []
+def create_coords(length, orientation, config=CONFIG):
+    return [boat for boat in get_boats(length, config) if boat.orientation == orientation]
 
-    if orientation == "vertical":
-        for start in range((board_size + 1) - length):
-            for r in range(board_size):
-                temp_coords = []
-                for c in range(length):
-                    temp_coords.append((r, c + start))
-                coords = tuple(temp_coords)
-                boats.append(Boat(coords, length, orientation))
 
-    elif orientation == "horizontal":
-        for start in range((board_size + 1) - length):
-            for r in range(board_size):
-                temp_coords = []
-                for c in range(length):
-                    temp_coords.append((r, c + start))
-                coords = tuple(temp_coords)
-                boats.append(Boat(coords, length, orientation))
+# The boats and games are only built the first time something asks for them,
+# and are cached per board configuration, so importing this file stays cheap.
+# There is one Boat per placement of the shared placement table, in table
+# order, so the index of a boat in get_all_boats is its placement id.
+@lru_cache(maxsize=None)
+def get_all_boats(config=CONFIG):
+    table = placement_table(config)
+    return tuple(Boat(table.coords[i], table.lengths[i], table.orientations[i], config) for i in range(len(table)))
 
-    return boats
 
+def get_boats(length, config=CONFIG):
+    all_boats = get_all_boats(config)
+    return [all_boats[i] for i in placement_table(config).by_length[length]]
 
-# Boats by size and orientation
-all_boats_5_horizontal = create_coords(5, "horizontal", BOARD_SIZE)
-all_boats_5_vertical = create_coords(5, "vertical", BOARD_SIZE)
-all_boats_4_horizontal = create_coords(4, "horizontal", BOARD_SIZE)
-all_boats_4_vertical = create_coords(4, "vertical", BOARD_SIZE)
-all_boats_3_horizontal = create_coords(3, "horizontal", BOARD_SIZE)
-all_boats_3_vertical = create_coords(3, "vertical", BOARD_SIZE)
 
-# Boats by size
-all_boats_5 = all_boats_5_horizontal + all_boats_5_vertical
-all_boats_4 = all_boats_4_horizontal + all_boats_4_vertical
-all_boats_3 = all_boats_3_horizontal + all_boats_3_vertical
+def iter_games(config=CONFIG):
+    # Only the games whose boats are separated, found by backtracking: a boat
+    # that runs into the halo of the boats already placed is skipped right away
+    all_boats = get_all_boats(config)
+    for game in placement_table(config).iter_games():
+        yield Game(tuple(all_boats[i] for i in game))
 
-# All the boats
-all_boats = all_boats_5 + all_boats_4 + all_boats_3
 
-# there is only one boat of length 5,4, and 3 in each game
-for boat1 in all_boats_5:
-    for boat2 in all_boats_4:
-        for boat3 in all_boats_3:
-            all_games.append(Game(tuple([boat1, boat2, boat3])))
+@lru_cache(maxsize=None)
+def get_all_games(config=CONFIG):
+    return list(iter_games(config))
 
 
 # ----------------------------------------- Guessing Stuff -----------------------------------------
@@ -172,86 +171,25 @@ def process_guess(game_board, player_board, x, y):
         player_board[x][y] = 'M'  # Mark as miss on the player's board
         return False
 
-# ----------------------------------------- Generate Random Game -----------------------------------------
-
-
-BOAT_LENGTHS = [5, 4, 3]  # Lengths of boats to be placed
-
-
-def is_valid_placement(board, boat_coords):
-    for x, y in boat_coords:
-        if x < 0 or x >= BOARD_SIZE or y < 0 or y >= BOARD_SIZE or board[x][y] == 1:
-            return False
-        # Check surrounding cells
-        for dx in [-1, 0, 1]:
-            for dy in [-1, 0, 1]:
-                adj_x, adj_y = x + dx, y + dy
-                if 0 <= adj_x < BOARD_SIZE and 0 <= adj_y < BOARD_SIZE and board[adj_x][adj_y] == 1:
-                    return False
-    return True
 
+# ----------------------------------------- Generate Random Game -----------------------------------------
 
-def place_boat(board, length, max_attempts=1000):
-    attempts = 0
-    while attempts < max_attempts:
-        orientation = random.choice(['horizontal', 'vertical'])
-        if orientation == 'horizontal':
-            x = random.randint(0, BOARD_SIZE - 1)
-            y = random.randint(0, BOARD_SIZE - length)
-            boat_coords = [(x, y + i) for i in range(length)]
-        else:
-            x = random.randint(0, BOARD_SIZE - length)
-            y = random.randint(0, BOARD_SIZE - 1)
-            boat_coords = [(x + i, y) for i in range(length)]
-
-        if is_valid_placement(board, boat_coords):
-            for coord in boat_coords:
-                board[coord[0]][coord[1]] = 1  # Mark the boat position
-            return True
-        attempts += 1
-
-    return False  # Failed to place the boat
-
-
-def generate_game():
-    board = [[0 for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
-    for length in BOAT_LENGTHS:
-        if not place_boat(board, length):
-            # Could not place a boat, so start over or handle it differently
-            return generate_game()  # This is a simple recursive approach to start over
-    return board
+def generate_game(config=CONFIG, rng=random):
+    # uniform over the valid fleets, see sampling.py
+    return HiddenFleet(placement_table(config), fleet_sampler(config).sample(rng))
 # ----------------------------------------- Frequency Map Stuff -----------------------------------------
 
 
-def is_valid_game(game):
-    # Check each pair of boats for separation
-    for i in range(len(game.boats)):
-        for j in range(i + 1, len(game.boats)):
-            if not boats_are_separated(game.boats[i], game.boats[j]):
-                return False
-    return True
-
-
-def boats_are_separated(boat1, boat2):
-    for x1, y1 in boat1.coords:
-        for x2, y2 in boat2.coords:
-            if abs(x1 - x2) <= 1 and abs(y1 - y2) <= 1:
-                return False
-    return True
-
-
-def count_boat_occupancy(solutions):
+def count_fleet_occupancy(solution):
     occupancy_count = [[0 for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
 
-    if solutions is None:
-        return occupancy_count  # Return empty or default occupancy count
+    if solution is None:
+        return occupancy_count  # No fleet agrees with the guesses
 
-    for sol in solutions:
-        if hasattr(sol, 'boats') and sol:
-            for boat in sol.boats:
-                for coord in boat.coords:
-                    x, y = coord
-                    occupancy_count[x][y] += 1
+    table = placement_table(CONFIG)
+    for placement in decode_fleet(solution, CONFIG):
+        for x, y in table.coords[placement]:
+            occupancy_count[x][y] += 1
 
     return occupancy_count
 
@@ -277,48 +215,35 @@ def print_board(board_status):
         print()
 # ----------------------------------------- Main -----------------------------------------
 
-def build_theory():
-    E._custom_constraints.clear()
-    valid_games = []
-
-    # First, find all valid games (with separated boats)
-    all_valid = 0
-    for game in all_games:
-        if is_valid_game(game):
-            all_valid += 1
-            valid_games.append(game)
-    print(all_valid)
-    for x, y, is_hit in guesses:
-        invalid_games = 0
-        for game in valid_games:
-            boat_at_guess = any(coord == (x, y) for boat in game.boats for coord in boat.coords)
-            if (is_hit and not boat_at_guess) or (not is_hit and boat_at_guess):
-                invalid_games += 1
-                valid_games.remove(game)
-                # E.add_constraint(~Game(game.boats))
-
-        print(f"Guess at ({x},{y}), Hit: {is_hit}, Invalidated Games: {invalid_games}")
-
-    for game in valid_games:
-        E.add_constraint(Game(game.boats))
-    return E
-
-
 if __name__ == "__main__":
-    board_status = generate_game()
+    hidden_fleet = generate_game()
+    board_status = hidden_fleet.board()
     print_board(board_status)
 
     player_board = [[0 for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
 
+    game_state = GameState(CONFIG)
+    # the SAT session is only needed to draw solutions; density mode reads the game state
+    solver_session = None if DENSITY_MODE else SolverSession(CONFIG)
+    game_log = GameLog(GAME_LOG_PATH) if GAME_LOG_PATH else None
+    logged_game = game_log.start_game(CONFIG, board_status) if game_log else None
+
     game_over = False
     while not game_over:
-        # Recompile the theory with the updated constraints
-        T = build_theory()
-        T_new = T.compile()
-        new_solution = T_new.solve()
-        # pp.pprint(new_solution)
-        # Count boat occupancy based on the solutions
-        occupancy_count = count_boat_occupancy(new_solution)
+        # the time the solver spends on a move, without the player's typing
+        turn_start = time.perf_counter()
+        if DENSITY_MODE:
+            occupancy_count = game_state.occupancy().tolist()
+        else:
+            # The base theory is loaded once; the guesses are solver assumptions
+            new_solution = solver_session.solve()
+
+            # Count boat occupancy based on the solution
+            with instrument.timer("count_fleet_occupancy"):
+                occupancy_count = count_fleet_occupancy(new_solution)
+
+        solver_seconds = time.perf_counter() - turn_start
+
         for row in occupancy_count:
             print(row)
 
@@ -328,10 +253,30 @@ if __name__ == "__main__":
         x, y = guess_coord
 
         # determine if the guess is a hit or miss
+        update_start = time.perf_counter()
         result = process_guess(board_status, player_board, x, y)
         guesses.append((x, y, result))
+        game_state.process_guess(x, y, result)
+        if solver_session is not None:
+            solver_session.observe(x, y, result)
+        sunk_length = hidden_fleet.fire(x, y)[1]
+        if sunk_length:
+            print(f"You sank a boat of length {sunk_length}!")
+            game_state.process_sunk(x, y, sunk_length)
+            if solver_session is not None:
+                solver_session.observe_sunk(x, y, sunk_length)
+        solver_seconds += time.perf_counter() - update_start
+        if game_log:
+            game_log.guess(logged_game, x, y, result, sunk_length, 1000 * solver_seconds)
         print(guesses)
-
-
-
-
+        if instrument.enabled():
+            print(instrument.summary())
+        if sum(row.count('H') for row in player_board) == sum(CONFIG.boat_lengths):
+            print(f"You sank every boat in {len(guesses)} guesses!")
+            game_over = True
+
+    if game_log:
+        game_log.end_game(logged_game, len(guesses))
+        game_log.close()
+    if solver_session is not None:
+        solver_session.close()
@@ -0,0 +1,72 @@
+from itertools import product
+
+import pytest
+
+from bitboard import (BoardConfig, cell_bit, coords_to_mask, create_placements, halo_mask, mask_to_coords,
+                      placement_table)
+
+TWIN_CONFIG = BoardConfig(6, (3, 3, 2))
+
+
+def test_masks_round_trip():
+    coords = [(0, 0), (2, 3), (5, 5)]
+    mask = coords_to_mask(coords, 6)
+    assert mask == cell_bit(0, 0, 6) | cell_bit(2, 3, 6) | cell_bit(5, 5, 6)
+    assert mask_to_coords(mask, 6) == coords
+
+
+def test_halo_covers_the_boat_and_its_neighbours():
+    coords = ((1, 1), (1, 2))
+    halo = set(mask_to_coords(halo_mask(coords, 6), 6))
+    assert halo == {(r, c) for r in range(3) for c in range(4)}
+    # in the corner the halo is clipped to the board
+    assert set(mask_to_coords(halo_mask(((0, 0),), 6), 6)) == {(0, 0), (0, 1), (1, 0), (1, 1)}
+
+
+def test_placement_counts():
+    table = placement_table(BoardConfig())
+    for length in (5, 4, 3):
+        assert len(table.by_length[length]) == 2 * 6 * (6 + 1 - length)
+    assert len(list(create_placements(1, 6))) == 36
+
+
+def test_separation_matches_coordinates():
+    table = placement_table(BoardConfig())
+
+    def touching(a, b):
+        return any(abs(r1 - r2) <= 1 and abs(c1 - c2) <= 1 for r1, c1 in a for r2, c2 in b)
+
+    ids = range(0, len(table), 7)
+    for i in ids:
+        for j in ids:
+            assert table.boats_are_separated(i, j) == (not touching(table.coords[i], table.coords[j]))
+
+
+def brute_force_games(config):
+    """
+    Every fleet found by filtering the full product of placements, each set of placements once.
+    """
+    table = placement_table(config)
+    ships = [table.by_length[length] for length in config.boat_lengths]
+    return {frozenset(game) for game in product(*ships) if table.is_valid_game(game)}
+
+
+@pytest.mark.parametrize("config, expected", [(BoardConfig(), 1840), (TWIN_CONFIG, 10068),
+                                              (BoardConfig(5, (3, 2), "none"), 956)])
+def test_enumeration_matches_brute_force(config, expected):
+    games = placement_table(config).games()
+    assert len(games) == expected
+    assert {frozenset(game) for game in games} == brute_force_games(config)
+
+
+def test_twins_are_listed_once():
+    games = placement_table(TWIN_CONFIG).games()
+    assert len(set(games)) == len(games)
+    assert all(game[0] < game[1] for game in games)
+
+
+def test_blocked_cells_are_skipped():
+    table = placement_table(BoardConfig())
+    blocked = coords_to_mask([(2, 2)], 6)
+    games = list(table.iter_games(blocked))
+    assert games == [game for game in table.games() if not table.game_mask(game) & blocked]
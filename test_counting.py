@@ -0,0 +1,65 @@
+import os
+import random
+
+import pytest
+
+from bitboard import BoardConfig, HiddenFleet, placement_table
+from game_state import GameState
+from sampling import fleet_sampler
+from theory_cache import compiled_theory
+
+pytestmark = pytest.mark.skipif(not os.path.exists(os.path.join(os.path.dirname(__file__), "bin", "dsharp")),
+                                reason="needs the dsharp binary")
+
+
+@pytest.mark.parametrize("config, twins", [(BoardConfig(), 1), (BoardConfig(6, (3, 3, 2)), 2)])
+def test_hit_counts_match_the_density_board(config, twins):
+    from counting import hit_counts
+
+    total, board = hit_counts(compiled_theory(config, None), config)
+    state = GameState(config)
+    # ships of equal length are interchangeable, so each fleet is counted once per order
+    assert total == twins * len(state)
+    assert (state.occupancy() * twins == board).all()
+
+
+@pytest.mark.parametrize("config, twins", [(BoardConfig(), 1), (BoardConfig(6, (3, 3, 2)), 2)])
+def test_conditioned_board_follows_the_guesses(config, twins):
+    from counting import CompiledBoard
+
+    rng = random.Random(1)
+    state, board = GameState(config), CompiledBoard(config)
+    fleet = HiddenFleet(placement_table(config), fleet_sampler(config).sample(rng))
+    cells = [(r, c) for r in range(config.size) for c in range(config.size)]
+    for x, y in rng.sample(cells, 15):
+        is_hit = fleet.fire(x, y)[0]
+        state.process_guess(x, y, is_hit)
+        board.observe(x, y, is_hit)
+        total, counts = board.hit_counts()
+        assert total == board.count() == twins * len(state)
+        assert (state.occupancy() * twins == counts).all()
+
+
+@pytest.mark.parametrize("config, twins", [(BoardConfig(6, (3, 3, 2)), 2), (BoardConfig(5, (3, 2), "none"), 1)])
+def test_sinks_follow_the_game_state(config, twins):
+    from counting import CompiledBoard
+
+    for seed in range(3):
+        rng = random.Random(seed)
+        state, board = GameState(config), CompiledBoard(config)
+        fleet = HiddenFleet(placement_table(config), fleet_sampler(config).sample(rng))
+        cells = [(r, c) for r in range(config.size) for c in range(config.size)]
+        rng.shuffle(cells)
+        for x, y in cells:
+            is_hit, sunk_length = fleet.fire(x, y)
+            state.process_guess(x, y, is_hit)
+            board.observe(x, y, is_hit)
+            if sunk_length:
+                state.process_sunk(x, y, sunk_length)
+                board.observe_sunk(x, y, sunk_length)
+                total, counts = board.hit_counts()
+                assert total == twins * len(state)
+                assert (state.occupancy() * twins == counts).all()
+            if fleet.all_sunk():
+                break
+        assert board.sunk == state.sunk
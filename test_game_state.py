@@ -0,0 +1,51 @@
+import random
+
+import pytest
+
+from bitboard import STANDARD_CONFIG, BoardConfig, HiddenFleet, placement_table
+from game_state import GameState
+from sampling import fleet_sampler
+
+
+def test_large_boards_are_refused():
+    with pytest.raises(ValueError):
+        GameState(STANDARD_CONFIG)
+
+
+def play(config, seed, *backends):
+    """
+    Fire at every cell of a random fleet in a random order, telling each
+    backend about the guesses and the sunk boats. Returns the fleet.
+    """
+    rng = random.Random(seed)
+    fleet = HiddenFleet(placement_table(config), fleet_sampler(config).sample(rng))
+    cells = [(r, c) for r in range(config.size) for c in range(config.size)]
+    rng.shuffle(cells)
+    for x, y in cells:
+        is_hit, sunk_length = fleet.fire(x, y)
+        for backend in backends:
+            backend.process_guess(x, y, is_hit)
+            if sunk_length:
+                backend.process_sunk(x, y, sunk_length)
+        if fleet.all_sunk():
+            break
+    return fleet
+
+
+@pytest.mark.parametrize("config", [BoardConfig(), BoardConfig(6, (3, 3, 2)), BoardConfig(5, (3, 2), "none")])
+def test_sinks_keep_the_true_game(config):
+    for seed in range(10):
+        state = GameState(config)
+        fleet = play(config, seed, state)
+        assert len(state.sunk) == len(config.boat_lengths)
+        assert sorted(fleet.game) in [sorted(game) for game in state.games.tolist()]
+
+
+def test_touching_boats_are_told_apart():
+    config = BoardConfig(5, (3, 2), "none")
+    for seed in range(20):
+        state = GameState(config)
+        fleet = play(config, seed, state)
+        # the hits cover the whole fleet and the sinks split it into boats
+        assert len(state) == 1
+        assert sorted(fleet.game) == sorted(state.games[0].tolist())
@@ -0,0 +1,61 @@
+import random
+
+from bitboard import BoardConfig, HiddenFleet, placement_table
+from gamelog import GameLog, iter_games, replay
+from sampling import fleet_sampler
+
+CONFIG = BoardConfig(5, (3, 2))
+
+
+def log_game(log, rng, moves=None):
+    """
+    Play a random game into ``log``: to the end, or given up after ``moves``.
+    Returns the hidden board and the (x, y, is_hit, sunk) guesses.
+    """
+    fleet = HiddenFleet(placement_table(CONFIG), fleet_sampler(CONFIG).sample(rng))
+    board = fleet.board()
+    game = log.start_game(CONFIG, board)
+    cells = [(r, c) for r in range(CONFIG.size) for c in range(CONFIG.size)]
+    rng.shuffle(cells)
+    guesses = []
+    for x, y in cells[:moves]:
+        is_hit, sunk = fleet.fire(x, y)
+        log.guess(game, x, y, is_hit, sunk, ms=0.5)
+        guesses.append((x, y, is_hit, sunk))
+        if fleet.all_sunk():
+            log.end_game(game, len(guesses))
+            return board, guesses
+    log.end_game(game, len(guesses), abandoned=True)
+    return board, guesses
+
+
+def test_logged_games_replay(tmp_path):
+    path = str(tmp_path / "games.jsonl")
+    rng = random.Random(5)
+    with GameLog(path) as log:
+        played = [log_game(log, rng), log_game(log, rng, moves=4), log_game(log, rng)]
+
+    games = list(iter_games(path))
+    assert [(game.board, game.guesses) for game in games] == played
+    assert [(game.finished, game.abandoned) for game in games] == [(True, False), (False, True), (True, False)]
+    assert all(game.config == CONFIG for game in games)
+
+    for (game, remaining), (board, guesses) in zip(replay(path), played):
+        assert len(remaining) == len(guesses)
+        # the true fleet always survives, and a finished game leaves only it
+        assert all(remaining)
+        if game.finished:
+            assert remaining[-1] == 1
+
+
+def test_unfinished_games_come_last(tmp_path):
+    path = str(tmp_path / "games.jsonl")
+    with GameLog(path) as log:
+        first = log.start_game(CONFIG, [[0] * CONFIG.size for _ in range(CONFIG.size)])
+        log.guess(first, 0, 0, False)
+        second = log.start_game(CONFIG, [[0] * CONFIG.size for _ in range(CONFIG.size)])
+        log.end_game(second, 0, abandoned=True)
+    games = list(iter_games(path))
+    assert [game.game for game in games] == [second, first]
+    assert not games[1].finished and not games[1].abandoned
+    assert games[1].guesses == [(0, 0, False, 0)]
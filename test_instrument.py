@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+import instrument
+
+
+@pytest.fixture
+def recorder():
+    was_enabled = instrument.enabled()
+    instrument.reset()
+    yield instrument
+    instrument.enable(was_enabled)
+    instrument.reset()
+
+
+def test_nothing_is_recorded_when_disabled(recorder):
+    recorder.enable(False)
+    assert recorder.timer("a") is recorder.timer("b")
+    with recorder.timer("a"):
+        recorder.count("n")
+        recorder.record("v", 3)
+    assert recorder.report() == {"timings": {}, "counters": {}, "values": {}}
+
+
+def test_timings_counters_and_values_when_enabled(recorder, tmp_path):
+    recorder.enable()
+    for value in (4, 9, 2):
+        with recorder.timer("turn"):
+            recorder.count("guesses")
+            recorder.record("games", value)
+    recorder.count("guesses", 10)
+    report = recorder.report()
+    assert report["timings"]["turn"]["calls"] == 3
+    assert report["counters"] == {"guesses": 13}
+    assert report["values"]["games"] == {"samples": 3, "mean": 5, "max": 9, "last": 2}
+    assert "turn" in recorder.summary() and "guesses" in recorder.summary()
+
+    path = tmp_path / "instrument.json"
+    recorder.dump_json(str(path))
+    assert json.loads(path.read_text()) == report
+
+    recorder.reset()
+    assert recorder.report() == {"timings": {}, "counters": {}, "values": {}}
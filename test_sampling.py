@@ -0,0 +1,33 @@
+import random
+from collections import Counter
+
+import pytest
+
+from bitboard import BoardConfig, placement_table
+from sampling import FleetSampler
+
+
+@pytest.mark.parametrize("enumerate_games", [True, False])
+def test_sampler_is_uniform(enumerate_games):
+    config = BoardConfig(5, (3, 2))
+    sampler = FleetSampler(config, enumerate_games)
+    games = placement_table(config).games()
+    draws = 100 * len(games)
+    rng = random.Random(7)
+    counts = Counter(sampler.sample(rng) for _ in range(draws))
+    assert set(counts) == set(games)
+    # chi-square against the uniform distribution, far below the rejection region
+    expected = draws / len(games)
+    chi2 = sum((count - expected) ** 2 / expected for count in counts.values())
+    dof = len(games) - 1
+    assert chi2 < dof + 5 * (2 * dof) ** 0.5
+
+
+def test_boards_show_the_sampled_fleet():
+    config = BoardConfig()
+    sampler = FleetSampler(config)
+    board = sampler.sample_board(random.Random(3))
+    game = sampler.sample(random.Random(3))
+    table = placement_table(config)
+    cells = {cell for i in game for cell in table.coords[i]}
+    assert cells == {(r, c) for r in range(6) for c in range(6) if board[r][c]}
@@ -0,0 +1,131 @@
+import asyncio
+import json
+
+from gamelog import GameLog, iter_games
+from server import GameServer
+
+
+class Client:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    async def send(self, line):
+        self.writer.write(line.encode() + b"\n")
+        await self.writer.drain()
+        return json.loads(await self.reader.readline())
+
+    async def ask(self, **request):
+        return await self.send(json.dumps(request))
+
+
+def serve(play, log=None):
+    """
+    Run ``play(server, connect)`` against a server on a free port, where
+    ``connect()`` opens a new client connection.
+    """
+    async def main():
+        server = GameServer(seed=1, log=log)
+        tcp = await server.start(port=0)
+        port = tcp.sockets[0].getsockname()[1]
+        writers = []
+
+        async def connect():
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writers.append(writer)
+            return Client(reader, writer)
+
+        try:
+            return await play(server, connect)
+        finally:
+            for writer in writers:
+                writer.close()
+                await writer.wait_closed()
+            # let the handlers see the connections go before the server stops
+            await asyncio.sleep(0.1)
+            tcp.close()
+            await tcp.wait_closed()
+            server.close()
+
+    return asyncio.run(main())
+
+
+def test_a_game_plays_to_the_end():
+    async def play(server, connect):
+        client = await connect()
+        new = await client.ask(op="new")
+        assert new["size"] == server.config.size and new["boat_lengths"] == list(server.config.boat_lengths)
+        game = new["game"]
+
+        heatmap = await client.ask(op="heatmap", game=game)
+        assert heatmap["candidates"] == sum(map(sum, heatmap["board"])) // sum(server.config.boat_lengths)
+        solution = await client.ask(op="solve", game=game)
+        assert sorted(map(len, solution["fleet"])) == sorted(server.config.boat_lengths)
+
+        while True:
+            move = await client.ask(op="suggest", game=game, strategy="density")
+            response = await client.ask(op="guess", game=game, **move)
+            assert "error" not in response
+            if response["won"]:
+                break
+        assert response["candidates"] == 1
+        # the only fleet left is the hidden one
+        fleet = server.sessions[game].fleet
+        solved = (await client.ask(op="solve", game=game))["fleet"]
+        assert sorted(sorted(map(tuple, boat)) for boat in solved) == \
+            sorted(sorted(fleet.table.coords[i]) for i in fleet.game)
+        assert await client.ask(op="guess", game=game, x=0, y=0) == {"error": "every boat is already sunk"}
+        assert await client.ask(op="close", game=game) == {"closed": game}
+        assert game not in server.sessions
+
+    serve(play)
+
+
+def test_bad_requests_get_errors():
+    async def play(server, connect):
+        client, other = await connect(), await connect()
+        game = (await client.ask(op="new"))["game"]
+        size = server.config.size
+
+        bad = [
+            await client.send("{not json"),
+            await client.send("[1, 2]"),
+            await client.ask(op="fly", game=game),
+            await other.ask(op="guess", game=game, x=0, y=0),
+            await client.ask(op="guess", game=game + 1, x=0, y=0),
+            await client.ask(op="guess", game=game, x=True, y=0),
+            await client.ask(op="guess", game=game, x=size, y=0),
+            await client.ask(op="guess", game=game, x=0),
+            await client.ask(op="suggest", game=game, strategy="psychic"),
+        ]
+        assert all(set(response) == {"error"} for response in bad)
+
+        assert "error" not in await client.ask(op="guess", game=game, x=1, y=1)
+        assert "already guessed" in (await client.ask(op="guess", game=game, x=1, y=1))["error"]
+        # the game is still there and still owned by the first connection only
+        assert (await client.ask(op="heatmap", game=game))["candidates"] > 0
+        assert "error" in await other.ask(op="close", game=game)
+
+    serve(play)
+
+
+def test_games_are_logged(tmp_path):
+    path = str(tmp_path / "games.jsonl")
+
+    async def play(server, connect):
+        client = await connect()
+        won, left = (await client.ask(op="new"))["game"], (await client.ask(op="new"))["game"]
+        while not (await client.ask(op="guess", game=won,
+                                    **await client.ask(op="suggest", game=won)))["won"]:
+            pass
+        await client.ask(op="guess", game=left, x=0, y=0)
+        await client.ask(op="close", game=left)
+
+    with GameLog(path) as log:
+        serve(play, log)
+    games = list(iter_games(path))
+    assert [(game.finished, game.abandoned) for game in games] == [(True, False), (False, True)]
+    assert len(games[1].guesses) == 1
+    with open(path) as f:
+        guesses = [event for event in map(json.loads, f) if event["event"] == "guess"]
+    assert all("ms" in event for event in guesses)
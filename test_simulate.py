@@ -0,0 +1,15 @@
+from simulate import simulate, simulate_parallel, summarize
+from strategy import RandomStrategy
+
+
+def test_results_do_not_depend_on_the_number_of_processes():
+    runs = [simulate_parallel(RandomStrategy(), 60, seed=4, chunk_size=10, processes=n) for n in (1, 2, 3)]
+    assert runs[0] == runs[1] == runs[2]
+    assert sum(runs[0].values()) == 60
+
+
+def test_random_play_sinks_the_fleet():
+    distribution = simulate(RandomStrategy(0), 20, seed=1)
+    stats = summarize(distribution)
+    assert stats["games"] == 20
+    assert 12 <= stats["min"] and stats["max"] <= 36
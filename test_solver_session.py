@@ -0,0 +1,43 @@
+import random
+
+from bitboard import BoardConfig, HiddenFleet, placement_table
+from compact import decode_fleet
+from game_state import GameState
+from sampling import fleet_sampler
+from solver_session import SolverSession
+
+TWIN_CONFIG = BoardConfig(6, (3, 3, 2))
+
+
+def observe_random_cells(config, seed, n, state, session):
+    rng = random.Random(seed)
+    fleet = HiddenFleet(placement_table(config), fleet_sampler(config).sample(rng))
+    cells = [(r, c) for r in range(config.size) for c in range(config.size)]
+    for x, y in rng.sample(cells, n):
+        is_hit = fleet.fire(x, y)[0]
+        state.process_guess(x, y, is_hit)
+        session.observe(x, y, is_hit)
+    return fleet
+
+
+def test_models_match_game_state():
+    state = GameState(TWIN_CONFIG)
+    with SolverSession(TWIN_CONFIG) as session:
+        observe_random_cells(TWIN_CONFIG, 3, 12, state, session)
+        models = [decode_fleet(model, TWIN_CONFIG) for model in session.models()]
+        # the generator switched its blocking clauses off again
+        assert session.solve() is not None
+    # the two ships of length 3 are interchangeable, so each fleet comes up once per order
+    assert len(models) == 2 * len(state)
+    fleets = {(min(a, b), max(a, b), c) for a, b, c in models}
+    assert fleets == set(map(tuple, state.games.tolist()))
+
+
+def test_solutions_agree_with_every_guess():
+    config = BoardConfig()
+    state = GameState(config)
+    with SolverSession(config) as session:
+        fleet = observe_random_cells(config, 5, 20, state, session)
+        model = decode_fleet(session.solve(), config)
+    assert model in set(map(tuple, state.games.tolist()))
+    assert fleet.game in set(map(tuple, state.games.tolist()))
@@ -0,0 +1,37 @@
+import pytest
+
+from simulate import simulate
+from strategy import STRATEGIES, Strategy
+
+
+def test_strategy_is_abstract():
+    with pytest.raises(TypeError):
+        Strategy()
+
+
+@pytest.mark.parametrize("name", sorted(STRATEGIES))
+def test_every_strategy_finishes_games(name):
+    strategy = STRATEGIES[name]()
+    strategy.reseed(0)
+    distribution = simulate(strategy, 10, seed=3)
+    assert sum(distribution.values()) == 10
+    assert min(distribution) >= 12 and max(distribution) <= 36
+
+
+def test_entropy_scores_are_the_binary_entropy_of_the_density():
+    import numpy as np
+
+    from game_state import GameState
+    from strategy import EntropyStrategy
+
+    state = GameState()
+    state.process_guess(2, 2, True)
+    player_board = [[0] * 6 for _ in range(6)]
+    player_board[2][2] = 'H'
+    n, density, gain = EntropyStrategy()._solve(player_board, state)
+    p = state.occupancy() / len(state)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        entropy = -np.nan_to_num(p * np.log2(p)) - np.nan_to_num((1 - p) * np.log2(1 - p))
+    assert n == len(state)
+    assert (density == state.occupancy()).all()
+    assert np.allclose(gain, entropy)
@@ -0,0 +1,36 @@
+import numpy as np
+
+from bitboard import BoardConfig, coords_to_mask, placement_table
+from symmetry import fleet_symmetry, symmetry
+
+
+def test_transforms_form_the_dihedral_group():
+    board = symmetry(6)
+    assert len({tuple(perm) for perm in board.perms}) == 8
+    assert board.perms[0] == list(range(36))
+    for t in range(8):
+        undo = board.inverse[t]
+        assert [board.perms[undo][image] for image in board.perms[t]] == list(range(36))
+
+
+def test_masks_cells_and_boards_move_together():
+    board = symmetry(5)
+    values = np.arange(25).reshape(5, 5)
+    cells = [(0, 1), (3, 4)]
+    for t in range(8):
+        image = board.transform_board(values, t)
+        for cell in cells:
+            x, y = board.transform_cell(cell, t)
+            assert image[x, y] == values[cell]
+        moved = coords_to_mask([board.transform_cell(cell, t) for cell in cells], 5)
+        assert board.transform_mask(coords_to_mask(cells, 5), t) == moved
+        assert (board.transform_board(image, board.inverse[t]) == values).all()
+
+
+def test_placements_map_to_placements_of_the_same_length():
+    config = BoardConfig(6, (3, 3, 2))
+    table = placement_table(config)
+    fleet = fleet_symmetry(config)
+    for perm in fleet.placement_perms:
+        assert sorted(perm) == list(range(len(table)))
+        assert all(table.lengths[perm[i]] == table.lengths[i] for i in range(len(table)))
@@ -0,0 +1,35 @@
+from bitboard import BoardConfig
+from compact import Hit, build_compact_theory
+from theory_cache import _compiled, cache_key, compiled_theory, load_theory, save_theory, with_observations
+
+CONFIG = BoardConfig(5, (3, 2))
+
+
+def clause_set(T):
+    return {frozenset((var.name, var.true) for var in clause) for clause in T}
+
+
+def test_save_load_round_trip(tmp_path):
+    T = build_compact_theory(CONFIG).compile()
+    path = str(tmp_path / "theory.json")
+    save_theory(T, path)
+    loaded = load_theory(path)
+    assert clause_set(loaded) == clause_set(T)
+    assert any(name.__class__.__name__ == "Place" for name in loaded.vars())
+
+
+def test_compiled_theory_reads_the_disk_cache(tmp_path):
+    _compiled.pop(cache_key(CONFIG), None)
+    T = compiled_theory(CONFIG, str(tmp_path))
+    assert (tmp_path / f"{cache_key(CONFIG)}.json").exists()
+    assert compiled_theory(CONFIG, str(tmp_path)) is T
+
+    _compiled.pop(cache_key(CONFIG))
+    assert clause_set(compiled_theory(CONFIG, str(tmp_path))) == clause_set(T)
+
+
+def test_observations_are_unit_clauses():
+    T = compiled_theory(CONFIG, None)
+    observed = with_observations(T, [(0, 0, True), (1, 1, False)])
+    assert clause_set(observed) - clause_set(T) == {frozenset([(Hit((0, 0)), True)]), frozenset([(Hit((1, 1)), False)])}
+    assert observed.satisfiable()
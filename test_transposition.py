@@ -0,0 +1,76 @@
+from game_state import GameState
+from transposition import ENTRY_OVERHEAD, Position, TranspositionCache, position_key
+
+
+def state_after(guesses):
+    state = GameState()
+    for x, y, is_hit in guesses:
+        state.process_guess(x, y, is_hit)
+    return state
+
+
+def test_key_ignores_the_order_of_guesses():
+    guesses = [(0, 0, False), (2, 2, True), (3, 2, True)]
+    assert position_key(state_after(guesses)) == position_key(state_after(guesses[::-1]))
+    assert position_key(state_after(guesses)) != position_key(state_after(guesses[:2]))
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = TranspositionCache(max_bytes=3 * ENTRY_OVERHEAD)
+    for key in "abc":
+        cache.put(key, Position(1))
+    assert cache.get("a") is not None
+    cache.put("d", Position(1))
+    assert "b" not in cache and "a" in cache and len(cache) == 3
+    assert cache.bytes == 3 * ENTRY_OVERHEAD
+    assert cache.get("b") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_rotated_positions_share_a_canonical_key():
+    from symmetry import symmetry
+    from transposition import canonical_position_key
+
+    guesses = [(0, 1, False), (2, 3, True), (4, 4, False)]
+    board = symmetry(6)
+    key, t = canonical_position_key(state_after(guesses))
+    for s in range(8):
+        moved = [board.transform_cell((x, y), s) + (is_hit,) for x, y, is_hit in guesses]
+        assert canonical_position_key(state_after(moved))[0] == key
+
+
+def test_cache_does_not_change_the_moves():
+    from simulate import simulate, simulate_parallel
+    from strategy import DensityStrategy
+
+    plain = simulate(DensityStrategy(), 100, seed=2)
+    assert simulate(DensityStrategy(TranspositionCache()), 100, seed=2) == plain
+    assert simulate(DensityStrategy(TranspositionCache(symmetric=False)), 100, seed=2) == plain
+    runs = [simulate_parallel(DensityStrategy(TranspositionCache()), 120, seed=11, chunk_size=20, processes=n)
+            for n in (1, 3)]
+    assert runs[0] == runs[1]
+
+
+def test_sinks_are_in_the_key_of_every_backend():
+    import os
+    from transposition import canonical_position_key
+    from solver_session import SolverSession
+
+    guesses = [(0, 0, True), (0, 1, True), (0, 2, True), (0, 3, False), (1, 1, False)]
+    state = state_after(guesses)
+    keys = {position_key(state)}
+    state.process_sunk(0, 2, 3)
+    backends = [SolverSession()]
+    if os.path.exists(os.path.join(os.path.dirname(__file__), "bin", "dsharp")):
+        from counting import CompiledBoard
+        backends.append(CompiledBoard())
+    for backend in backends:
+        for x, y, is_hit in guesses:
+            backend.observe(x, y, is_hit)
+        backend.observe_sunk(0, 2, 3)
+        keys.add(position_key(backend))
+        assert canonical_position_key(backend) == canonical_position_key(state)
+    keys.add(position_key(state))
+    # one key without the sink, one with it, shared by every backend
+    assert len(keys) == 2
+    backends[0].close()
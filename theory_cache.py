@@ -0,0 +1,97 @@
+"""
+Cache of compiled base theories.
+
+The base theory of a board (every legal fleet, from ``compact.py``) never
+changes during a game, so it is compiled once per configuration and kept in
+memory. It can also be written to disk as JSON (the variable table plus the
+clauses as signed integers), keyed by a hash of the board size, fleet,
+adjacency rule and encoding version, so a new process loads it instead of
+recompiling. Guesses are layered on top as unit clauses.
+"""
+import hashlib
+import json
+import os
+
+from nnf import And, Or, Var
+
+import instrument
+from bitboard import DEFAULT_CONFIG
+from compact import ENCODING_VERSION, Place, Hit, build_compact_theory
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".theory_cache")
+
+_compiled = {}
+
+
+def cache_key(config=DEFAULT_CONFIG):
+    description = json.dumps([config.size, list(config.boat_lengths), config.adjacency, ENCODING_VERSION])
+    return hashlib.sha256(description.encode()).hexdigest()[:16]
+
+
+def _name_to_json(name):
+    if name.__class__.__name__ == "Place":
+        return ["Place", name.ship, name.placement]
+    return ["Hit", name.coords[0], name.coords[1]]
+
+
+def _name_from_json(item):
+    if item[0] == "Place":
+        return Place(item[1], item[2])
+    return Hit((item[1], item[2]))
+
+
+def save_theory(T, path):
+    names = sorted(T.vars(), key=str)
+    ids = {name: i + 1 for i, name in enumerate(names)}
+    clauses = [[ids[var.name] if var.true else -ids[var.name] for var in clause] for clause in T]
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"vars": [_name_to_json(name) for name in names], "clauses": clauses}, f)
+    os.replace(tmp_path, path)
+
+
+def load_theory(path):
+    with open(path) as f:
+        data = json.load(f)
+    names = [_name_from_json(item) for item in data["vars"]]
+    return And([Or([Var(names[abs(lit) - 1], lit > 0) for lit in clause]) for clause in data["clauses"]])
+
+
+def compiled_theory(config=DEFAULT_CONFIG, cache_dir=CACHE_DIR):
+    """
+    The compiled base theory for a configuration: from memory if this process
+    has built it already, else from ``cache_dir`` (pass None to skip the disk),
+    else compiled now and saved there.
+    """
+    key = cache_key(config)
+    if key in _compiled:
+        instrument.count("theory_cache.memory_hits")
+        return _compiled[key]
+
+    path = os.path.join(cache_dir, f"{key}.json") if cache_dir else None
+    if path and os.path.exists(path):
+        instrument.count("theory_cache.disk_hits")
+        with instrument.timer("theory_cache.load"):
+            T = load_theory(path)
+    else:
+        instrument.count("theory_cache.misses")
+        with instrument.timer("build_theory"):
+            encoding = build_compact_theory(config)
+        instrument.count("constraints_added", len(encoding._custom_constraints))
+        with instrument.timer("compile"):
+            T = encoding.compile()
+        instrument.count("variables_created", len(T.vars()))
+        if path:
+            os.makedirs(cache_dir, exist_ok=True)
+            save_theory(T, path)
+
+    _compiled[key] = T
+    return T
+
+
+def with_observations(T, guesses):
+    """
+    The base theory plus one unit clause per (x, y, is_hit) guess.
+    """
+    units = [Or([Var(Hit((x, y)), is_hit)]) for x, y, is_hit in guesses]
+    return And(list(T.children) + units)
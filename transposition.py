@@ -0,0 +1,186 @@
+"""
+Transposition cache of solved positions.
+
+Many games reach the same set of observations in a different order, and a
+position only depends on that set: the hit cells, the missed cells and the
+ships announced sunk. ``position_key`` turns any backend that keeps a
+``config`` and a ``guesses`` list (GameState, CompiledBoard, SolverSession)
+into that canonical key, and a ``TranspositionCache`` maps keys to what was
+worked out for the position: the number of surviving games, the density
+board and the move chosen there. Entries are evicted least recently used
+first once their estimated size passes ``max_bytes``.
+
+A rotated or mirrored position has the rotated or mirrored answer, so
+``TranspositionCache.position`` stores every position once per symmetry
+orbit: the key is the canonical image of the observations (see
+symmetry.py), the entry is kept in that canonical frame, and it is mapped
+back onto the board of the caller on the way out. The move is always
+chosen in the canonical frame (``solve_position``), so ties between equal
+scores go the same way whichever member of the orbit is on the board, and
+a cached, uncached or symmetric-off strategy plays the same moves.
+"""
+from collections import OrderedDict
+
+import numpy as np
+
+import instrument
+from bitboard import cell_bit
+from symmetry import fleet_symmetry
+
+# rough size of a key, an entry and the dict slot holding them, on top of the density board
+ENTRY_OVERHEAD = 400
+
+
+def position_key(backend):
+    """
+    (config, hit mask, miss mask, sunk ships) for the guesses of a backend.
+    """
+    size = backend.config.size
+    hit_mask = miss_mask = 0
+    for x, y, is_hit in backend.guesses:
+        if is_hit:
+            hit_mask |= cell_bit(x, y, size)
+        else:
+            miss_mask |= cell_bit(x, y, size)
+    sunk = tuple(sorted(getattr(backend, "sunk", ())))
+    return backend.config, hit_mask, miss_mask, sunk
+
+
+def canonical_position_key(backend):
+    """
+    The smallest image of ``position_key(backend)`` over the board
+    symmetries, and the transform that gives it.
+    """
+    config, hit_mask, miss_mask, sunk = position_key(backend)
+    fleet = fleet_symmetry(config)
+    board = fleet.symmetry
+    best = None
+    for t in range(len(board)):
+        perm = fleet.placement_perms[t]
+        image = (board.transform_mask(hit_mask, t), board.transform_mask(miss_mask, t),
+                 tuple(sorted((length, tuple(sorted(perm[i] for i in ids))) for length, ids in sunk)))
+        if best is None or image < best[0]:
+            best = image, t
+    image, t = best
+    return (config,) + image, t
+
+
+def _canonical_solution(key, t, solve, board):
+    """
+    Run ``solve()`` and return its Position moved into the canonical frame of
+    ``key``, with the move picked there: the open cell of highest score, ties
+    to the first in row order.
+    """
+    count, density, scores = solve()
+    scores = board.transform_board(scores, t)
+    guessed = key[1] | key[2]
+    is_open = np.array([not guessed >> cell & 1 for cell in range(scores.size)]).reshape(scores.shape)
+    scores = np.where(is_open, scores, -np.inf)
+    move = tuple(int(i) for i in np.unravel_index(np.argmax(scores), scores.shape))
+    return Position(count, board.transform_board(density, t), move)
+
+
+def solve_position(backend, solve):
+    """
+    The Position of ``backend`` from ``solve()``, which returns (number of
+    games, density board, score of every cell) in the frame of the caller.
+    """
+    key, t = canonical_position_key(backend)
+    board = fleet_symmetry(key[0]).symmetry
+    return _moved(_canonical_solution(key, t, solve, board), board, board.inverse[t])
+
+
+class Position:
+    __slots__ = ("count", "density", "move")
+
+    def __init__(self, count=None, density=None, move=None):
+        self.count = count
+        self.density = density
+        self.move = move
+
+    def nbytes(self):
+        return ENTRY_OVERHEAD + getattr(self.density, "nbytes", 0)
+
+
+class TranspositionCache:
+    def __init__(self, max_bytes=64 * 2 ** 20, symmetric=True):
+        self.max_bytes = max_bytes
+        self.symmetric = symmetric
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key):
+        position = self._entries.get(key)
+        if position is None:
+            self.misses += 1
+            instrument.count("transposition.misses")
+            return None
+        self.hits += 1
+        instrument.count("transposition.hits")
+        self._entries.move_to_end(key)
+        return position
+
+    def put(self, key, position):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.bytes -= old.nbytes()
+        self._entries[key] = position
+        self.bytes += position.nbytes()
+        while self.bytes > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self.bytes -= evicted.nbytes()
+
+    def lookup(self, key, compute):
+        """
+        The cached position for ``key``, or ``compute()`` stored under it.
+        """
+        position = self.get(key)
+        if position is None:
+            position = compute()
+            self.put(key, position)
+        return position
+
+    def position(self, backend, solve):
+        """
+        The position of ``backend``, with ``solve()`` run on a miss (see
+        ``solve_position``). With ``symmetric`` set, the entry is shared by
+        the whole symmetry orbit.
+        """
+        if not self.symmetric:
+            return self.lookup(position_key(backend), lambda: solve_position(backend, solve))
+
+        key, t = canonical_position_key(backend)
+        board = fleet_symmetry(key[0]).symmetry
+        position = self.get(key)
+        if position is None:
+            position = _canonical_solution(key, t, solve, board)
+            self.put(key, position)
+        return _moved(position, board, board.inverse[t])
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def _moved(position, board, t):
+    density = None if position.density is None else board.transform_board(position.density, t)
+    move = None if position.move is None else board.transform_cell(position.move, t)
+    return Position(position.count, density, move)